@@ -1,109 +1,214 @@
 """The Ufanet Door Phone integration."""
 from __future__ import annotations
 
+import asyncio
+import importlib
 import logging
-from datetime import timedelta
-from typing import (List)
+import shutil
+from typing import TYPE_CHECKING
 
 from homeassistant.config_entries import ConfigEntry 
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP 
-from homeassistant.core import HomeAssistant 
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed 
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import issue_registry as ir
 from homeassistant.exceptions import ConfigEntryNotReady, ConfigEntryAuthFailed 
 
-from .const import DOMAIN, CONF_USERNAME, CONF_PASSWORD, CONF_DEVICE_ID, DEFAULT_SCAN_INTERVAL, CONF_LOGGER_NAME
-from .api.ufanet_api import UfanetIntercomAPI
-from .api.models import Intercom
-from .api.exceptions import UnauthorizedUfanetIntercomAPIError, ClientConnectorUfanetIntercomAPIError
+from .const import (DOMAIN, CONF_USERNAME, CONF_PASSWORD, CONF_LOGGER_NAME, CONF_TOKEN,
+                    DATA_MANAGER, PREVIEW_CACHE_DIR, CONF_ARCHIVE_CLIPS, EVENT_CALL)
+from .api.exceptions import UnauthorizedUfanetIntercomAPIError, BadRequestUfanetIntercomAPIError
+from .services import async_setup_services
 
-from .device import DoorPhoneDevice, create_devices, devices_to_dict
+# Клиент API (aiohttp, pydantic) и модули записи загружаются только при настройке записи,
+# чтобы импорт интеграции и config flow ничего не стоили при старте HA
+if TYPE_CHECKING:
+    from .catalog import IntercomCatalog
+    from .coordinator import DoorPhoneCoordinator
 
 _LOGGER = logging.getLogger(CONF_LOGGER_NAME)
 
+PLATFORMS = ["lock", "image", "sensor", "event"]
+
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the Ufanet Door Phone component."""
     hass.data.setdefault(DOMAIN, {})
+    async_setup_services(hass)
     return True
 
 #def get_mock_intercoms() -> List[Intercom]:
 #    mock_responce = [{'id': 109757, 'contract': None, 'role': {'id': 8, 'name': 'Домофон-калитка'}, 'camera': None, 'cctv_number': '1738053250GTF70', 'string_view': 'г. Уфа, Заки Валиди, 71', 'timeout': 10, 'disable_button': False, 'no_sound': True, 'open_in_talk': 'http', 'open_type': 'http', 'dtmf_code': '#0', 'inactivity_reason': None, 'house': 458263, 'frsi': True, 'is_fav': False, 'model': 39, 'custom_name': None, 'is_blocked': False, 'supports_key_recording': True, 'ble_support': True, 'is_support_sip_monitor': False, 'relays': [], 'private_status': 1, 'scope': 'owner'}, {'id': 103616, 'contract': None, 'role': {'id': 8, 'name': 'Домофон-калитка'}, 'camera': None, 'cctv_number': '1737985955HSN76', 'string_view': 'г. Уфа, Заки Валиди, 73', 'timeout': 10, 'disable_button': False, 'no_sound': True, 'open_in_talk': 'http', 'open_type': 'http', 'dtmf_code': '#0', 'inactivity_reason': None, 'house': 31465, 'frsi': True, 'is_fav': False, 'model': 39, 'custom_name': None, 'is_blocked': False, 'supports_key_recording': True, 'ble_support': True, 'is_support_sip_monitor': False, 'relays': [], 'private_status': 1, 'scope': 'owner'}, {'id': 103413, 'contract': 664192, 'role': {'id': 2, 'name': 'Домофон'}, 'camera': None, 'cctv_number': '1737976793GSM0', 'string_view': 'г. Уфа, Заки Валиди, 73, п.1', 'timeout': 10, 'disable_button': False, 'no_sound': True, 'open_in_talk': 'http', 'open_type': 'http', 'dtmf_code': '#0', 'inactivity_reason': None, 'house': 31465, 'frsi': True, 'is_fav': False, 'model': 39, 'custom_name': None, 'is_blocked': False, 'supports_key_recording': True, 'ble_support': True, 'is_support_sip_monitor': False, 'relays': [], 'private_status': 1, 'scope': 'owner'}]
 #    return [Intercom(**i) for i in mock_responce]
 
+def _import_modules(names: tuple[str, ...]) -> None:
+    for name in names:
+        importlib.import_module(f".{name}", __name__)
+
+async def async_import_modules(hass: HomeAssistant, *names: str) -> None:
+    """Импортировать модули интеграции в executor, не блокируя event loop."""
+    await hass.async_add_executor_job(_import_modules, names)
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Ufanet Door Phone from a config entry."""
     
     hass.data.setdefault(DOMAIN, {})
+
+    await async_import_modules(hass, "manager", "catalog", "history_sync", "coordinator", "warmup")
+    from .api.resilience import CircuitBreaker
+    from .catalog import IntercomCatalog
+    from .coordinator import DoorPhoneCoordinator
+    from .history_sync import CallHistorySync
+    from .manager import async_get_manager
+    from .warmup import UnlockWarmer
     
     # Получаем сохраненные учетные данные
     username = entry.data[CONF_USERNAME]
     password = entry.data[CONF_PASSWORD]
     
-    # Создаем API клиент
-    ufanet_api = UfanetIntercomAPI(contract=username, password=password)
-    await ufanet_api._prepare_token()
+    def _async_save_token(token: dict) -> None:
+        """Сохраняем новый токен в записи, чтобы после перезапуска не логиниться заново."""
+        hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_TOKEN: token})
+
+    # Создаем API клиент, переиспользуя токен из config flow или прошлого запуска
+    # (старые записи хранят в CONF_TOKEN строку-заглушку, ее игнорируем)
+    # Клиент работает на общем пуле соединений и общих лимитах менеджера
+    stored_token = entry.data.get(CONF_TOKEN)
+    manager = await async_get_manager(hass)
+    ufanet_api = manager.create_client(entry.entry_id, contract=username, password=password,
+                                       token=stored_token if isinstance(stored_token, dict) else None,
+                                       on_token_update=_async_save_token)
     
-    async def async_update_data():
-        """Fetch data from API endpoint."""
+    @callback
+    def _async_circuit_changed(state: str) -> None:
+        """Облако недоступно - показываем предупреждение в разделе «Ремонт»."""
+        issue_id = f"cloud_unavailable_{entry.entry_id}"
+        if state == CircuitBreaker.OPEN:
+            ir.async_create_issue(
+                hass, DOMAIN, issue_id,
+                is_fixable=False,
+                severity=ir.IssueSeverity.WARNING,
+                translation_key="cloud_unavailable",
+                translation_placeholders={"title": entry.title,
+                                          "error": str(ufanet_api.circuit_breaker.last_error)},
+            )
+        elif state == CircuitBreaker.CLOSED:
+            ir.async_delete_issue(hass, DOMAIN, issue_id)
+
+    ufanet_api.circuit_breaker.on_state_change = _async_circuit_changed
+
+    async def _async_abort_setup() -> None:
+        """Настройка не удалась: закрываем клиент и убираем его из менеджера, иначе он останется в общих лимитах."""
+        hass.data[DOMAIN].pop(entry.entry_id, None)
+        manager.release_client(entry.entry_id)
+        ir.async_delete_issue(hass, DOMAIN, f"cloud_unavailable_{entry.entry_id}")
+        await ufanet_api.close()
+
+    history_sync = CallHistorySync(ufanet_api)
+    warmer = UnlockWarmer(hass, ufanet_api)
+
+    # Домофоны берем из локального снимка, чтобы старт не зависел от облака.
+    # Без снимка (первый запуск) ждем облако, как раньше.
+    catalog = IntercomCatalog(hass, entry, ufanet_api)
+
+    # Координатор истории звонков с адаптивным интервалом опроса
+    coordinator = DoorPhoneCoordinator(hass, entry, ufanet_api, history_sync, warmer, catalog, manager.archive)
+
+    has_snapshot = await catalog.async_load()
+    if not has_snapshot:
         try:
-            # Простая проверка подключения
-            status = 'mock OK status' # await api.async_get_status()
-            _LOGGER.debug("API status: %s", status)
-            return status
-        except UnauthorizedUfanetIntercomAPIError as err:
+            await ufanet_api._prepare_token()
+            await catalog.async_refresh()
+        except (UnauthorizedUfanetIntercomAPIError, BadRequestUfanetIntercomAPIError) as err:
+            await _async_abort_setup()
             raise ConfigEntryAuthFailed from err
-        except ClientConnectorUfanetIntercomAPIError as err:
-            raise UpdateFailed(f"Error communicating with API: {err}") from err
-    
-    # Создаем координатор для обновления данных
-    coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name=DOMAIN,
-        update_method=async_update_data,
-        update_interval=timedelta(seconds=DEFAULT_SCAN_INTERVAL),
-    )
-    
-    intercoms = await ufanet_api.get_intercoms() #get_mock_intercoms()
-
-    devices = create_devices(intercoms)
+        except Exception as err:
+            await _async_abort_setup()
+            raise ConfigEntryNotReady from err
 
     # Сохраняем данные
     hass.data[DOMAIN][entry.entry_id] = {
         "api": ufanet_api,
         "coordinator": coordinator,
-        "devices": devices
+        "catalog": catalog,
+        "history": history_sync,
+        "warmer": warmer
     }
     
-    # Запускаем обновление данных для проверки подключения
-    try:
-        await coordinator.async_config_entry_first_refresh()
-    except ConfigEntryAuthFailed:
-        await ufanet_api.async_close()
-        raise
-    except Exception as err:
-        await ufanet_api.async_close()
-        raise ConfigEntryNotReady from err
+    # Запускаем обновление данных для проверки подключения.
+    # Со снимком домофонов замки работают и без облака: первый опрос делаем в фоне,
+    # со сдвигом по времени, чтобы десятки договоров не опрашивали облако одновременно.
+    if not has_snapshot:
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except ConfigEntryAuthFailed:
+            await _async_abort_setup()
+            raise
+        except Exception as err:
+            await _async_abort_setup()
+            raise ConfigEntryNotReady from err
     
     # Обработчик для закрытия соединения при остановке HA
     async def async_shutdown(event):
         """Shutdown the integration."""
-        await ufanet_api.async_close()
+        await ufanet_api.close()
     
     entry.async_on_unload(
         hass.bus.async_listen(EVENT_HOMEASSISTANT_STOP, async_shutdown)
     )
+
+    @callback
+    def _async_archive_clip(event: Event) -> None:
+        """Новый звонок договора: ставим его видеозапись в фоновую загрузку, если это включено."""
+        if event.data["entry_id"] == entry.entry_id and entry.options.get(CONF_ARCHIVE_CLIPS):
+            manager.clips.async_enqueue(entry, ufanet_api, event.data["uuid"])
+
+    entry.async_on_unload(hass.bus.async_listen(EVENT_CALL, _async_archive_clip))
+
+    # Сущности получают звонки сигналом SIGNAL_CALL, а не как слушатели координатора.
+    # Координатор без слушателей не планирует следующий опрос, поэтому подписываемся сами.
+    entry.async_on_unload(coordinator.async_add_listener(lambda: None))
     
     _LOGGER.warning("Ufanet Door Phone integration setup successfully for user: %s", username)
     
-    await hass.config_entries.async_forward_entry_setups(entry, ["lock"])
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    if has_snapshot:
+        entry.async_create_background_task(
+            hass,
+            _async_staggered_start(catalog, coordinator, manager.poll_offset(entry.entry_id)),
+            f"{DOMAIN}_start_{entry.entry_id}",
+        )
 
     return True
 
+async def _async_staggered_start(catalog: IntercomCatalog, coordinator: DoorPhoneCoordinator, delay: float) -> None:
+    """Фоновая сверка снимка домофонов с облаком и первый опрос истории."""
+    await asyncio.sleep(delay)
+    try:
+        await catalog.async_refresh()
+    except Exception as err:
+        _LOGGER.warning("Failed to refresh intercom list, using cached snapshot: %s", err)
+    await coordinator.async_refresh()
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if DOMAIN in hass.data and entry.entry_id in hass.data[DOMAIN]:
         data = hass.data[DOMAIN].pop(entry.entry_id)
+        hass.data[DOMAIN][DATA_MANAGER].release_client(entry.entry_id)
+        data["warmer"].async_stop()
+        ir.async_delete_issue(hass, DOMAIN, f"cloud_unavailable_{entry.entry_id}")
         await data["api"].close()
-        await hass.config_entries.async_unload_platforms(entry, ["lock"])
+        await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     
-    return True
\ No newline at end of file
+    return True
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove a config entry."""
+    await async_import_modules(hass, "catalog")
+    from .catalog import IntercomCatalog
+
+    await IntercomCatalog(hass, entry, None).async_remove()
+    manager = hass.data.get(DOMAIN, {}).get(DATA_MANAGER)
+    if manager is not None:
+        await manager.archive.async_remove_entry(entry.entry_id)
+    await hass.async_add_executor_job(
+        shutil.rmtree, hass.config.path(PREVIEW_CACHE_DIR, entry.entry_id), True
+    )
@@ -0,0 +1,88 @@
+"""Small in-memory caches used by the API client."""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import (Any,
+                    Awaitable,
+                    Callable,
+                    Dict,
+                    Generic,
+                    Hashable,
+                    Optional,
+                    Tuple,
+                    TypeVar)
+
+T = TypeVar('T')
+
+
+class TTLLRUCache(Generic[T]):
+    """Bounded LRU cache where every entry also has its own expiry time."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300, clock: Callable[[], float] = time.monotonic):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[Hashable, Tuple[float, T]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[T]:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: T, ttl: float = None):
+        ttl = self._ttl if ttl is None else ttl
+        if ttl <= 0:
+            self._data.pop(key, None)
+            return
+        self._data[key] = (self._clock() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+
+class InFlight:
+    """Deduplicates concurrent calls: callers with the same key share one awaitable."""
+
+    def __init__(self):
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._pending[key] = future
+            future.add_done_callback(lambda done: self._done(key, done))
+        # shield: one cancelled waiter must not cancel the request for the others
+        return await asyncio.shield(future)
+
+    def _done(self, key: Hashable, future: asyncio.Future):
+        if self._pending.get(key) is future:
+            del self._pending[key]
+        # Mark the exception as retrieved even if every waiter was cancelled
+        if not future.cancelled():
+            future.exception()
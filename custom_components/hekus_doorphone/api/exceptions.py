@@ -13,8 +13,19 @@ class TimeoutUfanetIntercomAPIError(UfanetIntercomAPIError):
 class UnknownUfanetIntercomAPIError(UfanetIntercomAPIError):
     """"""
 
+class ServerErrorUfanetIntercomAPIError(UnknownUfanetIntercomAPIError):
+    """5xx or 429: the cloud itself is in trouble"""
+
+    def __init__(self, *args, retry_after: float = None):
+        super().__init__(*args)
+        # Seconds from a numeric Retry-After header, if the server sent one
+        self.retry_after = retry_after
+
 class InvalidTokenUfanetIntercomAPIError(UfanetIntercomAPIError):
     """"""
 
 class BadRequestUfanetIntercomAPIError(UfanetIntercomAPIError):
+    """"""
+
+class CircuitOpenUfanetIntercomAPIError(UfanetIntercomAPIError):
     """"""
\ No newline at end of file
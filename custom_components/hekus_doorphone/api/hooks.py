@@ -0,0 +1,90 @@
+"""Request hooks (tracing middleware) for UfanetIntercomAPI."""
+from __future__ import annotations
+
+import random
+from typing import (Any,
+                    Callable,
+                    List,
+                    Optional)
+
+# Keys whose values never leave the client: auth body, token verify body, token payloads
+SECRET_KEYS = frozenset({'password', 'token', 'access', 'refresh'})
+REDACTED = '**REDACTED**'
+
+
+def redact(value: Any) -> Any:
+    """Copy of a request/response payload with secret values replaced."""
+    if isinstance(value, dict):
+        return {key: REDACTED if key in SECRET_KEYS else redact(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+class RequestInfo:
+    """One HTTP request as seen by hooks. Payloads are redacted only when asked for."""
+
+    __slots__ = ('request_id', 'endpoint', 'method', 'url', '_params', '_json', 'started', 'elapsed', 'sampled')
+
+    def __init__(self, request_id: int, endpoint: str, method: str, url: str, params: Optional[dict],
+                 json: Optional[dict], started: float, sampled: bool = True):
+        self.request_id = request_id
+        self.endpoint = endpoint
+        self.method = method
+        self.url = url
+        self._params = params
+        self._json = json
+        self.started = started
+        self.elapsed: Optional[float] = None
+        self.sampled = sampled
+
+    @property
+    def params(self) -> Optional[dict]:
+        return redact(self._params)
+
+    @property
+    def json(self) -> Optional[dict]:
+        return redact(self._json)
+
+    def __repr__(self):
+        return (f'RequestInfo(id={self.request_id}, endpoint={self.endpoint}, method={self.method}, '
+                f'url={self.url}, params={self.params}, json={self.json}, elapsed={self.elapsed})')
+
+
+RequestHook = Callable[[RequestInfo], None]
+ErrorHook = Callable[[RequestInfo, BaseException], None]
+
+
+class RequestHooks:
+    """Callbacks around every request of a client.
+
+    on_request_start/on_request_end run for a `sample_rate` share of requests;
+    on_error runs for every failed request. Hooks run on the event loop and must not block.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, rand: Callable[[], float] = random.random):
+        self.on_request_start: List[RequestHook] = []
+        self.on_request_end: List[RequestHook] = []
+        self.on_error: List[ErrorHook] = []
+        self.sample_rate = sample_rate
+        self._rand = rand
+
+    def start(self, request_id: int, endpoint: str, method: str, url: str, params: Optional[dict],
+              json: Optional[dict], started: float) -> RequestInfo:
+        sampled = self.sample_rate >= 1 or self._rand() < self.sample_rate
+        info = RequestInfo(request_id, endpoint, method, url, params, json, started, sampled)
+        if sampled:
+            for hook in self.on_request_start:
+                hook(info)
+        return info
+
+    def end(self, info: RequestInfo, elapsed: float):
+        info.elapsed = elapsed
+        if info.sampled:
+            for hook in self.on_request_end:
+                hook(info)
+
+    def error(self, info: RequestInfo, elapsed: float, error: BaseException):
+        info.elapsed = elapsed
+        for hook in self.on_error:
+            hook(info, error)
@@ -0,0 +1,129 @@
+"""Priority lanes: request classes sharing one connection pool."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import (Deque,
+                    Dict,
+                    Optional)
+
+from .session import CONNECTOR_LIMIT_PER_HOST
+
+# Request classes, highest priority first
+INTERACTIVE = 'interactive'
+CONTROL = 'control'
+BACKGROUND = 'background'
+CLASSES = (INTERACTIVE, CONTROL, BACKGROUND)
+
+# Connections only interactive requests may take
+RESERVED_INTERACTIVE = 2
+CONTROL_LIMIT = 2
+
+
+class _Slot:
+    __slots__ = ('_lanes', '_request_class')
+
+    def __init__(self, lanes: PriorityLanes, request_class: str):
+        self._lanes = lanes
+        self._request_class = request_class
+
+    async def __aenter__(self):
+        await self._lanes.acquire(self._request_class)
+
+    async def __aexit__(self, *exc_info):
+        self._lanes.release(self._request_class)
+
+
+class PriorityLanes:
+    """Admission control in front of the connection pool.
+
+    `capacity` should match the connector's per-host limit: requests are only let
+    through while a connection is free, so they never queue inside aiohttp, whose
+    pool does not serve waiters in order. Waiting requests are served by class
+    (interactive, then control, then background) and FIFO within a class: a queued
+    background request is passed over whenever a higher class waits. The last
+    `reserved` slots are for interactive requests only, and each class may have
+    its own concurrency limit.
+    """
+
+    def __init__(self, capacity: int = CONNECTOR_LIMIT_PER_HOST, reserved: int = RESERVED_INTERACTIVE,
+                 limits: Optional[Dict[str, int]] = None):
+        self.capacity = capacity
+        self.reserved = min(reserved, capacity - 1)
+        self.limits: Dict[str, int] = {INTERACTIVE: capacity, CONTROL: CONTROL_LIMIT,
+                                       BACKGROUND: capacity - self.reserved}
+        if limits:
+            self.limits.update(limits)
+        self.active: Dict[str, int] = dict.fromkeys(CLASSES, 0)
+        self._in_use = 0
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {request_class: deque() for request_class in CLASSES}
+        # Times a waiting background request was passed over by a higher class
+        self.preempted = 0
+
+    def slot(self, request_class: str) -> _Slot:
+        """`async with lanes.slot(BACKGROUND): ...` holds one slot for the block."""
+        return _Slot(self, request_class)
+
+    def _pool_free(self, request_class: str) -> bool:
+        limit = self.capacity if request_class == INTERACTIVE else self.capacity - self.reserved
+        return self._in_use < limit
+
+    def _can_start(self, request_class: str) -> bool:
+        return self.active[request_class] < self.limits[request_class] and self._pool_free(request_class)
+
+    def _grant(self, request_class: str):
+        self.active[request_class] += 1
+        self._in_use += 1
+
+    async def acquire(self, request_class: str):
+        # Fast path: nobody of this or a higher class is waiting and a slot is free
+        if self._can_start(request_class) and not self._queued_up_to(request_class):
+            self._grant(request_class)
+            return
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._waiters[request_class]
+        waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted and cancelled in the same loop iteration: hand the slot on
+                self.release(request_class)
+            elif future in waiters:
+                # Otherwise _wake may already have popped (and skipped) the cancelled future
+                waiters.remove(future)
+            raise
+
+    def release(self, request_class: str):
+        self.active[request_class] -= 1
+        self._in_use -= 1
+        self._wake()
+
+    def _queued_up_to(self, request_class: str) -> bool:
+        for other in CLASSES:
+            if self._waiters[other]:
+                return True
+            if other == request_class:
+                return False
+        return False
+
+    def _wake(self):
+        for request_class in CLASSES:
+            waiters = self._waiters[request_class]
+            while waiters and self._can_start(request_class):
+                future = waiters.popleft()
+                if future.done():
+                    continue
+                self._grant(request_class)
+                future.set_result(None)
+                if request_class != BACKGROUND and self._waiters[BACKGROUND]:
+                    self.preempted += 1
+            # A class held back by the pool (not by its own limit) blocks the classes below it
+            if waiters and not self._pool_free(request_class):
+                return
+
+    def as_dict(self) -> dict:
+        return {'capacity': self.capacity, 'reserved_interactive': self.reserved, 'limits': dict(self.limits),
+                'active': dict(self.active),
+                'queued': {request_class: len(waiters) for request_class, waiters in self._waiters.items()},
+                'preempted': self.preempted}
@@ -0,0 +1,119 @@
+"""Per-endpoint request counters and latency histograms."""
+from __future__ import annotations
+
+import bisect
+from collections import Counter
+from typing import (Any,
+                    Dict,
+                    List,
+                    Optional)
+
+
+def _make_bounds(start: float = 0.001, stop: float = 120.0, factor: float = 1.2) -> List[float]:
+    bounds = []
+    value = start
+    while value < stop:
+        bounds.append(value)
+        value *= factor
+    bounds.append(stop)
+    return bounds
+
+
+# Log-spaced bucket upper bounds in seconds: ~20% relative error, O(1) memory per endpoint
+LATENCY_BOUNDS = _make_bounds()
+
+
+class LatencyHistogram:
+    def __init__(self, bounds: List[float] = LATENCY_BOUNDS):
+        self._bounds = bounds
+        self._buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self._buckets[bisect.bisect_left(self._bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th percentile (0 < q <= 100)."""
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for index, bucket in enumerate(self._buckets):
+            seen += bucket
+            if seen >= rank:
+                return min(self._bounds[index], self.max) if index < len(self._bounds) else self.max
+        return self.max
+
+
+class EndpointStats:
+    def __init__(self):
+        self.count = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.errors: Counter[str] = Counter()
+        self.latency = LatencyHistogram()
+        self.last_latency: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            'count': self.count,
+            'errors': dict(self.errors),
+            'retries': self.retries,
+            'cache_hits': self.cache_hits,
+            'last_ms': ms(self.last_latency),
+            'mean_ms': ms(self.latency.total / self.latency.count) if self.latency.count else None,
+            'p50_ms': ms(self.latency.percentile(50)),
+            'p95_ms': ms(self.latency.percentile(95)),
+            'p99_ms': ms(self.latency.percentile(99)),
+            'max_ms': ms(self.latency.max if self.latency.count else None),
+        }
+
+
+class ApiMetrics:
+    """Metrics of one API client, keyed by endpoint name (e.g. 'open_intercom')."""
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointStats] = {}
+
+    def _stats(self, endpoint: str) -> EndpointStats:
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        return stats
+
+    def record(self, endpoint: str, seconds: float, error: BaseException = None):
+        stats = self._stats(endpoint)
+        stats.count += 1
+        stats.last_latency = seconds
+        stats.latency.record(seconds)
+        if error is not None:
+            stats.errors[type(error).__name__] += 1
+
+    def record_retry(self, endpoint: str):
+        self._stats(endpoint).retries += 1
+
+    def record_cache_hit(self, endpoint: str):
+        self._stats(endpoint).cache_hits += 1
+
+    def get(self, endpoint: str) -> Optional[EndpointStats]:
+        return self.endpoints.get(endpoint)
+
+    @property
+    def total_count(self) -> int:
+        return sum(stats.count for stats in self.endpoints.values())
+
+    @property
+    def total_errors(self) -> int:
+        return sum(sum(stats.errors.values()) for stats in self.endpoints.values())
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {endpoint: stats.as_dict() for endpoint, stats in sorted(self.endpoints.items())}
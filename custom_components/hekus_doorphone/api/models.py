@@ -65,4 +65,16 @@ class History(BaseModel):
 
 class HistoryData(BaseModel):
     url: str
-    preview: str
\ No newline at end of file
+    preview: str
+
+def model_to_dict(model: BaseModel) -> dict:
+    """Plain dict of a model (pydantic v2 model_dump or v1 dict)."""
+    dump = getattr(model, 'model_dump', None)
+    return dump() if dump is not None else model.dict()
+
+
+
+def model_to_json(model: BaseModel) -> str:
+    """Compact JSON of a model (pydantic v2 model_dump_json or v1 json)."""
+    dump_json = getattr(model, 'model_dump_json', None)
+    return dump_json() if dump_json is not None else model.json()
@@ -0,0 +1,214 @@
+"""Response parsing: strict pydantic validation or a trusted fast path.
+
+The trusted mode skips validation and builds compact `__slots__` dataclasses with
+the same fields as the models in `models.py` (keep the two in sync), so callers do
+not care which mode produced an object. Use it only for responses of the known
+Ufanet cloud.
+
+Parsers take the raw response body: the strict mode validates straight from bytes
+(pydantic v2 `validate_json`), the trusted mode decodes it with orjson when installed.
+Already decoded data (e.g. a stored snapshot) is accepted as well.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import (asdict,
+                         dataclass)
+from datetime import datetime
+from typing import (Any,
+                    Callable,
+                    Dict,
+                    List,
+                    Optional,
+                    Union)
+
+try:
+    from orjson import loads
+except ImportError:  # orjson is optional (Home Assistant ships it), the stdlib also takes bytes
+    from json import loads
+
+from .models import (History,
+                     HistoryData,
+                     Intercom)
+
+# Bodies of at least this many bytes (~100 calls of history) are parsed in the executor
+PARSE_IN_EXECUTOR_THRESHOLD = 32 * 1024
+
+RawOrDecoded = Union[bytes, str, Any]
+
+# What a malformed body raises: JSONDecodeError and pydantic's ValidationError are ValueErrors,
+# the trusted mode fails with TypeError/AttributeError on JSON of the wrong shape
+PARSE_ERRORS = (ValueError, TypeError, AttributeError)
+
+
+def decode(data: RawOrDecoded) -> Any:
+    """JSON body -> Python objects; already decoded data is returned as is."""
+    return loads(data) if isinstance(data, (bytes, str)) else data
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+class Record:
+    """Unvalidated model: plain attributes, model_dump()/model_dump_json() like pydantic v2."""
+
+    __slots__ = ()
+
+    def model_dump(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def model_dump_json(self) -> str:
+        return json.dumps(self.model_dump(), default=_json_default, separators=(',', ':'))
+
+
+def _build(cls, data: Dict[str, Any]):
+    """Record from a decoded object, positionally in field order; missing keys become None."""
+    return cls(*map(data.get, cls.__match_args__))
+
+
+@dataclass(slots=True)
+class FastRole(Record):
+    id: int
+    name: str
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> FastRole:
+        return _build(cls, data)
+
+
+@dataclass(slots=True)
+class FastIntercom(Record):
+    id: int
+    contract: Optional[int]
+    role: FastRole
+    camera: Optional[str]
+    cctv_number: str
+    string_view: str
+    timeout: int
+    disable_button: bool
+    no_sound: bool
+    open_in_talk: str
+    open_type: str
+    dtmf_code: str
+    inactivity_reason: Optional[str]
+    house: int
+    frsi: bool
+    is_fav: bool
+    model: int
+    custom_name: Optional[str]
+    is_blocked: bool
+    supports_key_recording: bool
+    ble_support: bool
+    is_support_sip_monitor: bool
+    relays: Optional[List]
+    private_status: int
+    scope: str
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> FastIntercom:
+        record = _build(cls, data)
+        if record.role is not None:
+            record.role = FastRole.from_dict(record.role)
+        return record
+
+
+@dataclass(slots=True)
+class FastHistoryResult(Record):
+    uuid: str
+    house_id: int
+    address: str
+    porch: str
+    flat: str
+    called_at: datetime
+    camera_number: str
+    skud_mac: str
+    timezone: str
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> FastHistoryResult:
+        record = _build(cls, data)
+        if record.called_at is not None:
+            record.called_at = datetime.fromisoformat(record.called_at)
+        return record
+
+
+@dataclass(slots=True)
+class FastHistory(Record):
+    count: int
+    next: Optional[str]
+    previous: Optional[str]
+    results: List[FastHistoryResult]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> FastHistory:
+        return cls(data.get('count'), data.get('next'), data.get('previous'),
+                   [FastHistoryResult.from_dict(item) for item in data.get('results') or ()])
+
+
+@dataclass(slots=True)
+class FastHistoryData(Record):
+    url: str
+    preview: str
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> FastHistoryData:
+        return _build(cls, data)
+
+
+class _Validator:
+    """Strict validation of raw or decoded JSON against a model type.
+
+    The pydantic schema is built on first use, so importing this module stays cheap.
+    """
+
+    def __init__(self, model_type: Any):
+        self._model_type = model_type
+        self._json: Callable[[Any], Any] = None
+        self._python: Callable[[Any], Any] = None
+
+    def _build(self):
+        model_type = self._model_type
+        try:
+            from pydantic import TypeAdapter
+        except ImportError:  # pydantic v1: decode first, then validate the objects
+            from pydantic import parse_obj_as
+            self._json = lambda raw: parse_obj_as(model_type, loads(raw))
+            self._python = lambda data: parse_obj_as(model_type, data)
+        else:
+            adapter = TypeAdapter(model_type)
+            self._json = adapter.validate_json
+            self._python = adapter.validate_python
+
+    def __call__(self, data: RawOrDecoded) -> Any:
+        if self._json is None:
+            self._build()
+        return self._json(data) if isinstance(data, (bytes, str)) else self._python(data)
+
+
+class ModelParser:
+    """Turns responses into models, validating them unless `trusted`."""
+
+    _intercoms = _Validator(List[Intercom])
+    _history = _Validator(History)
+    _history_data = _Validator(HistoryData)
+
+    def __init__(self, trusted: bool = False):
+        self.trusted = trusted
+
+    def intercoms(self, data: RawOrDecoded) -> List[Intercom]:
+        if self.trusted:
+            return [FastIntercom.from_dict(item) for item in decode(data)]
+        return self._intercoms(data)
+
+    def history(self, data: RawOrDecoded) -> History:
+        if self.trusted:
+            return FastHistory.from_dict(decode(data))
+        return self._history(data)
+
+    def history_data(self, data: RawOrDecoded) -> HistoryData:
+        if self.trusted:
+            return FastHistoryData.from_dict(decode(data))
+        return self._history_data(data)
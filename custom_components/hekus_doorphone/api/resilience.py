@@ -0,0 +1,136 @@
+"""Retry policy, circuit breaker and client-side rate limiter."""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from typing import (Callable,
+                    Iterator,
+                    Optional,
+                    Tuple,
+                    Type)
+
+from .exceptions import (CircuitOpenUfanetIntercomAPIError,
+                         ClientConnectorUfanetIntercomAPIError,
+                         ServerErrorUfanetIntercomAPIError,
+                         TimeoutUfanetIntercomAPIError)
+
+# Transport problems, 5xx and 429 are worth retrying and count against the breaker;
+# other 4xx and malformed bodies are not
+RETRYABLE_ERRORS: Tuple[Type[BaseException], ...] = (ClientConnectorUfanetIntercomAPIError,
+                                                     TimeoutUfanetIntercomAPIError,
+                                                     ServerErrorUfanetIntercomAPIError)
+
+
+class RetryPolicy:
+    """Bounded attempts with exponential backoff and full jitter."""
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 10.0,
+                 retryable: Tuple[Type[BaseException], ...] = RETRYABLE_ERRORS):
+        self.attempts = max(attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable = retryable
+
+    def is_retryable(self, error: BaseException) -> bool:
+        return isinstance(error, self.retryable)
+
+    def delays(self) -> Iterator[float]:
+        """Sleep before each retry (attempts - 1 values)."""
+        for attempt in range(self.attempts - 1):
+            yield random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Fails fast while the cloud is down.
+
+    closed -> open after `failure_threshold` consecutive failures; open -> half_open
+    after `reset_timeout`, where a single probe request decides between closed and open.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0,
+                 on_state_change: Callable[[str], None] = None, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_state_change = on_state_change
+        self._clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._probe_in_flight = False
+
+    def before_call(self):
+        if self.state == self.CLOSED:
+            return
+        if self.state == self.OPEN:
+            if self._clock() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenUfanetIntercomAPIError(f'Circuit open after {self.failures} failures: '
+                                                        f'{self.last_error}')
+            self._set_state(self.HALF_OPEN)
+        if self._probe_in_flight:
+            raise CircuitOpenUfanetIntercomAPIError('Circuit half-open, probe request in flight')
+        self._probe_in_flight = True
+
+    def record_success(self):
+        self._probe_in_flight = False
+        self.failures = 0
+        if self.state != self.CLOSED:
+            self._set_state(self.CLOSED)
+
+    def record_failure(self, error: BaseException):
+        self._probe_in_flight = False
+        self.failures += 1
+        self.last_error = repr(error)
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = self._clock()
+            if self.state != self.OPEN:
+                self._set_state(self.OPEN)
+
+    def record_ignored(self):
+        """Request finished with an error unrelated to cloud health (e.g. 400) or was cancelled."""
+        self._probe_in_flight = False
+
+    def _set_state(self, state: str):
+        self.state = state
+        if self.on_state_change is not None:
+            self.on_state_change(state)
+
+    def as_dict(self) -> dict:
+        return {'state': self.state, 'failures': self.failures, 'last_error': self.last_error}
+
+
+class TokenBucket:
+    """Client-side rate limiter: `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float = 5.0, capacity: float = 10.0, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+        self.throttled = 0
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        # Fast path without the lock: a token is available right now
+        self._refill()
+        if self._tokens >= 1 and not self._lock.locked():
+            self._tokens -= 1
+            return
+        async with self._lock:
+            self.throttled += 1
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
@@ -0,0 +1,51 @@
+"""Shared HTTP session and connector for Ufanet API clients."""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from aiohttp import (ClientSession,
+                     ClientTimeout,
+                     TCPConnector)
+
+# Keep-alive and pool settings tuned for a single cloud host (dom.ufanet.ru)
+CONNECTOR_LIMIT = 32
+CONNECTOR_LIMIT_PER_HOST = 8
+KEEPALIVE_TIMEOUT = 60
+DNS_CACHE_TTL = 300
+
+if TYPE_CHECKING:
+    import ssl
+
+
+@lru_cache(maxsize=1)
+def create_ssl_context() -> ssl.SSLContext:
+    """Build the certifi-backed SSL context once.
+
+    Loading the CA bundle is blocking, call it from an executor the first time
+    when running inside an event loop that must not block. certifi is imported
+    here, not at module level: it is only needed once a connector is created.
+    """
+    import ssl
+
+    import certifi
+
+    return ssl.create_default_context(cafile=certifi.where())
+
+
+def create_connector(ssl_context: ssl.SSLContext | None = None,
+                     limit: int = CONNECTOR_LIMIT,
+                     limit_per_host: int = CONNECTOR_LIMIT_PER_HOST) -> TCPConnector:
+    """Create a keep-alive connector with DNS cache and per-host limits."""
+    return TCPConnector(ssl=ssl_context or create_ssl_context(),
+                        limit=limit,
+                        limit_per_host=limit_per_host,
+                        keepalive_timeout=KEEPALIVE_TIMEOUT,
+                        ttl_dns_cache=DNS_CACHE_TTL,
+                        use_dns_cache=True)
+
+
+def create_session(timeout: int = 30, connector: TCPConnector | None = None) -> ClientSession:
+    """Create a client session on the tuned connector."""
+    return ClientSession(connector=connector or create_connector(),
+                         timeout=ClientTimeout(total=timeout))
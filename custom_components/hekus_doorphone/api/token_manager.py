@@ -0,0 +1,142 @@
+"""Single-flight, expiry-aware JWT token manager."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import (Any,
+                    Awaitable,
+                    Callable,
+                    Dict,
+                    Optional)
+
+from .models import Token
+
+# Start a background refresh this many seconds before the token expires
+REFRESH_MARGIN = 300
+# Treat the token as unusable this many seconds before exp (clock skew)
+EXPIRY_SKEW = 30
+# Never schedule background refreshes (or their retries) closer than this
+MIN_REFRESH_DELAY = 60
+
+
+def token_expires_at(token: Token, now: float) -> float:
+    """Unix time when the token expires.
+
+    The API returns exp as a unix timestamp; small values are treated as a
+    lifetime in seconds so a format change never makes every token look expired.
+    """
+    return float(token.exp) if token.exp > 10 ** 9 else now + token.exp
+
+
+def token_to_dict(token: Token, expires_at: float) -> Dict[str, Any]:
+    """Serializable form of a token for persistent storage."""
+    return {'access': token.access, 'refresh': token.refresh, 'exp': token.exp, 'expires_at': expires_at}
+
+
+def token_from_dict(data: Dict[str, Any]) -> tuple[Token, Optional[float]]:
+    """Inverse of token_to_dict; expires_at is None for data without it."""
+    token = Token(access=data['access'], refresh=data['refresh'], exp=data['exp'])
+    return token, data.get('expires_at')
+
+
+class TokenManager:
+    """Keeps the access/refresh pair and refreshes it once for all waiters."""
+
+    def __init__(self, fetch_token: Callable[[], Awaitable[Token]], refresh_margin: int = REFRESH_MARGIN,
+                 logger: logging.Logger = None, clock: Callable[[], float] = time.time,
+                 on_token_update: Callable[[Token, float], None] = None):
+        self._fetch_token = fetch_token
+        self._on_token_update = on_token_update
+        self._refresh_margin = refresh_margin
+        self._LOGGER = logger or logging.getLogger(__name__)
+        self._clock = clock
+        self._token: Optional[Token] = None
+        self._expires_at: float = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_handle: Optional[asyncio.TimerHandle] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def token(self) -> Optional[Token]:
+        return self._token
+
+    @property
+    def expires_at(self) -> float:
+        return self._expires_at
+
+    @property
+    def is_valid(self) -> bool:
+        return self._token is not None and self._clock() < self._expires_at - EXPIRY_SKEW
+
+    @staticmethod
+    def header_value(token: Token) -> str:
+        # API accepts the refresh token in the "JWT" Authorization header
+        return token.refresh
+
+    def set_token(self, token: Token, expires_at: float = None):
+        """Install a token (fresh login or restored from storage)."""
+        self._token = token
+        self._expires_at = expires_at if expires_at is not None else token_expires_at(token, self._clock())
+        self._schedule_refresh()
+
+    def invalidate(self, token: Optional[Token] = None):
+        """Forget the token if it is still the one that was rejected."""
+        if token is None or token is self._token:
+            self._token = None
+            self._expires_at = 0.0
+
+    async def async_get_token(self) -> Token:
+        """Return a usable token, refreshing only if there is none."""
+        if self.is_valid:
+            return self._token
+        return await self.async_refresh(stale=self._token)
+
+    async def async_refresh(self, stale: Optional[Token] = None) -> Token:
+        """Fetch a new token; concurrent callers share one request."""
+        async with self._lock:
+            # Someone else already replaced the stale token while we waited
+            if self._token is not None and self._token is not stale and self.is_valid:
+                return self._token
+            self._LOGGER.debug('Refreshing auth token')
+            self.set_token(await self._fetch_token())
+            if self._on_token_update is not None:
+                self._on_token_update(self._token, self._expires_at)
+            return self._token
+
+    def _schedule_refresh(self):
+        if self._refresh_handle is not None:
+            self._refresh_handle.cancel()
+            self._refresh_handle = None
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        lifetime = self._expires_at - self._clock()
+        # Short-lived tokens are refreshed at half-life instead of looping on the margin
+        delay = lifetime - self._refresh_margin if lifetime > 2 * self._refresh_margin else lifetime / 2
+        delay = max(delay, MIN_REFRESH_DELAY)
+        self._refresh_handle = loop.call_later(delay, self._start_background_refresh)
+
+    def _start_background_refresh(self):
+        self._refresh_handle = None
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.ensure_future(self._background_refresh())
+
+    async def _background_refresh(self):
+        try:
+            await self.async_refresh(stale=self._token)
+        except Exception as e:
+            # The next request will retry synchronously once the token is really expired
+            self._LOGGER.warning('Background token refresh failed: %r', e)
+            if self.is_valid:
+                self._refresh_handle = asyncio.get_running_loop().call_later(MIN_REFRESH_DELAY,
+                                                                             self._start_background_refresh)
+
+    async def close(self):
+        if self._refresh_handle is not None:
+            self._refresh_handle.cancel()
+            self._refresh_handle = None
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
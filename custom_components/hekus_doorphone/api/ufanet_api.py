@@ -2,123 +2,624 @@
 from __future__ import annotations
 
 import logging
-import aiohttp
-import ssl
-import certifi
 import asyncio
+import math
+import time
 
-from urllib.parse import urljoin
+from collections import deque
+from dataclasses import dataclass
+from urllib.parse import (parse_qs,
+                          urljoin,
+                          urlsplit)
 from json.decoder import JSONDecodeError
-from typing import (Any, Union, Dict, List)
-from aiohttp import (ClientSession,
-                     ClientTimeout,
-                     TCPConnector)
+from typing import (Any, AsyncIterator, Awaitable, Callable, Deque, Iterable, Union, Dict, List, Optional, Tuple)
+from aiohttp import (ClientResponse,
+                     ClientSession,
+                     ClientTimeout)
 from aiohttp.client_exceptions import (ClientConnectorError,
-                                       ContentTypeError)
-from uuid import (UUID,
-                  uuid4)
-from .exceptions import (ClientConnectorUfanetIntercomAPIError,
+                                       ClientError)
+from itertools import count
+from uuid import UUID
+from .exceptions import (UfanetIntercomAPIError,
+                         ClientConnectorUfanetIntercomAPIError,
                          TimeoutUfanetIntercomAPIError,
                          UnauthorizedUfanetIntercomAPIError,
                          UnknownUfanetIntercomAPIError,
-                         InvalidTokenUfanetIntercomAPIError,
+                         ServerErrorUfanetIntercomAPIError,
                          BadRequestUfanetIntercomAPIError)
 from .models import (History,
                      HistoryData,
+                     HistoryResult,
                      Intercom,
-                     Token)
+                     Token,
+                     model_to_json)
+from .cache import (InFlight,
+                    TTLLRUCache)
+from .lanes import (BACKGROUND,
+                    CONTROL,
+                    INTERACTIVE,
+                    PriorityLanes)
+from .hooks import (ErrorHook,
+                    RequestHook,
+                    RequestHooks,
+                    redact)
+from .metrics import ApiMetrics
+from .parsing import (PARSE_ERRORS,
+                      PARSE_IN_EXECUTOR_THRESHOLD,
+                      ModelParser,
+                      decode)
+from .resilience import (RETRYABLE_ERRORS,
+                         CircuitBreaker,
+                         RetryPolicy,
+                         TokenBucket)
+from .session import create_session
+from .token_manager import (TokenManager,
+                            token_from_dict,
+                            token_to_dict)
+
+
+# Links are signed and expire server-side; never keep them longer than this
+LINKS_TTL = 600
+LINKS_CACHE_SIZE = 256
+# Expiry query parameters seen in signed media URLs
+_EXPIRY_PARAMS = ('expires', 'Expires', 'exp')
+
+
+def links_ttl(links: HistoryData, default: float, margin: float = 30) -> float:
+    """TTL for cached links: default, or less if the URLs carry an expiry timestamp."""
+    ttl = default
+    now = time.time()
+    for link in (links.url, links.preview):
+        query = parse_qs(urlsplit(link).query)
+        for name in _EXPIRY_PARAMS:
+            value = query.get(name)
+            if value and value[0].isdigit():
+                ttl = min(ttl, int(value[0]) - now - margin)
+                break
+    return ttl
+
+
+# Per-endpoint TTL (seconds) of cached GET responses; concurrent identical GETs are merged
+# even with TTL 0. Endpoints not listed here (e.g. open_intercom) are never cached or merged.
+CACHE_TTLS: Dict[str, float] = {
+    'get_intercoms': 60,
+    'get_call_history': 5,
+}
+RESPONSE_CACHE_SIZE = 64
+# Request class (priority lane) per endpoint; everything else is background.
+# Only background requests are rate limited: a resident is waiting for the others.
+REQUEST_CLASSES = {'open_intercom': INTERACTIVE, 'auth': CONTROL, 'token_verify': CONTROL}
+# Expired entries are kept this long for ETag/Last-Modified revalidation
+RESPONSE_STALE_TTL = 3600
+# Debug logs show at most this many bytes of a response body
+LOG_BODY_LIMIT = 1024
+
+
+@dataclass
+class CachedResponse:
+    body: Optional[bytes]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh_until: float
+
+    def validators(self) -> Optional[Dict[str, str]]:
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers or None
+
+
+def _retry_after(response: ClientResponse) -> Optional[float]:
+    """Server back-off hint: a numeric Retry-After (HTTP dates are ignored)."""
+    value = response.headers.get('Retry-After')
+    return float(value) if value and value.isdigit() else None
+
+
+def _loggable_body(body: bytes) -> Any:
+    """Small bodies (auth, token verify) may carry tokens: redact them; large ones are cut."""
+    if len(body) <= LOG_BODY_LIMIT:
+        try:
+            return redact(decode(body))
+        except JSONDecodeError:
+            pass
+    return body[:LOG_BODY_LIMIT].decode(errors='replace')
 
 
 class UfanetIntercomAPI:
-    def __init__(self, contract: str, password: str, timeout: int = 30, logger_name: str = "UfanetIntercom"):
+    def __init__(self, contract: str, password: str, timeout: int = 30, logger_name: str = "UfanetIntercom",
+                 session: ClientSession = None, base_url: str = 'https://dom.ufanet.ru/',
+                 token: Dict[str, Any] = None, on_token_update: Callable[[Dict[str, Any]], None] = None,
+                 rate_limiter: TokenBucket = None, lanes: PriorityLanes = None,
+                 trusted_parsing: bool = False, hooks: RequestHooks = None):
         self._LOGGER = logging.getLogger(logger_name)
         self._contract = contract
         self._password = password
-        self._token: Union[str, None] = None
-        self._base_url: str = 'https://dom.ufanet.ru/'
+        self._on_token_update = on_token_update
+        self.metrics = ApiMetrics()
+        self.parser = ModelParser(trusted=trusted_parsing)
+        # None until a hook is added: the request path then skips tracing entirely
+        self.hooks: Optional[RequestHooks] = hooks
+        self._request_ids = count(1)
+        self.retry_policy = RetryPolicy()
+        # Unlock is hedged instead of retried with backoff: a late door is useless
+        self.retry_policies: Dict[str, RetryPolicy] = {'open_intercom': RetryPolicy(attempts=1)}
+        self.circuit_breaker = CircuitBreaker()
+        # Limits may be shared by several clients (accounts) on one session
+        self.rate_limiter = rate_limiter if rate_limiter is not None else TokenBucket()
+        # Connection slots by request class, so unlocks never queue behind history or media
+        self.lanes = lanes if lanes is not None else PriorityLanes()
+        self._links_cache: TTLLRUCache[HistoryData] = TTLLRUCache(maxsize=LINKS_CACHE_SIZE, ttl=LINKS_TTL)
+        self._links_in_flight = InFlight()
+        self._cache_ttls: Dict[str, float] = dict(CACHE_TTLS)
+        self._response_cache: TTLLRUCache[CachedResponse] = TTLLRUCache(maxsize=RESPONSE_CACHE_SIZE,
+                                                                         ttl=RESPONSE_STALE_TTL)
+        self._get_in_flight = InFlight()
+        self._tokens = TokenManager(self._fetch_token, logger=self._LOGGER, on_token_update=self._token_updated)
+        if token is not None:
+            self.restore_token(token)
+        self._base_url: str = base_url
+        self._timeout = ClientTimeout(total=timeout)
 
-        self.session: ClientSession = ClientSession(timeout=ClientTimeout(total=timeout))
+        # Injected sessions are shared with other clients and are not closed here
+        self._owns_session = session is None
+        self.session: ClientSession = session if session is not None else create_session(timeout=timeout)
 
     async def _send_request(self, url: str, method: str = 'GET', params: Dict[str, Any] = None,
-                            json: Dict[str, Any] = None) -> Union[Dict[str, Any], List[Dict[str, Any]], None]:
+                            json: Dict[str, Any] = None, authorized: bool = True,
+                            endpoint: str = 'other', timeout: ClientTimeout = None,
+                            raw: bool = False) -> Union[Dict[str, Any], List[Dict[str, Any]], bytes, None]:
+        """Decoded JSON of the response, or its raw body with `raw` (for parsing straight into models)."""
+        body = await self._send_cached(url, method, params, json, authorized, endpoint, timeout)
+        if raw or body is None:
+            return body
+        try:
+            return decode(body)
+        except JSONDecodeError as e:
+            raise UnknownUfanetIntercomAPIError(f'Invalid JSON from {endpoint}: {e}')
+
+    async def _send_cached(self, url: str, method: str, params: Optional[Dict[str, Any]],
+                           json: Optional[Dict[str, Any]], authorized: bool, endpoint: str,
+                           timeout: Optional[ClientTimeout]) -> Optional[bytes]:
+        cache_ttl = self._cache_ttls.get(endpoint) if method == 'GET' else None
+        if cache_ttl is None:
+            return await self._send_authorized(url, method, params, json, authorized, endpoint, timeout)
+
+        # Cacheable GET: fresh cache hit, else one shared (conditional) request for all concurrent callers
+        key = self._cache_key(url, params)
+        cached = self._response_cache.get(key)
+        if cached is not None and cached.fresh_until > time.monotonic():
+            self.metrics.record_cache_hit(endpoint)
+            return cached.body
+        return await self._get_in_flight.run(
+            key, lambda: self._revalidate(key, cached, cache_ttl, url, params, authorized, endpoint, timeout))
+
+    @staticmethod
+    def _cache_key(url: str, params: Optional[Dict[str, Any]]) -> Tuple:
+        return url, tuple(sorted(params.items())) if params else ()
+
+    async def _revalidate(self, key: Tuple, cached: Optional[CachedResponse], cache_ttl: float, url: str,
+                          params: Optional[Dict[str, Any]], authorized: bool, endpoint: str,
+                          timeout: Optional[ClientTimeout]) -> Optional[bytes]:
+        headers = cached.validators() if cached is not None else None
+        meta: Dict[str, Any] = {}
+        body = await self._send_authorized(url, 'GET', params, None, authorized, endpoint, timeout,
+                                           headers=headers, meta=meta)
+        if meta.get('status') == 304 and cached is not None:
+            body = cached.body
+        self._response_cache.set(key, CachedResponse(body=body, etag=meta.get('etag'),
+                                                     last_modified=meta.get('last_modified'),
+                                                     fresh_until=time.monotonic() + cache_ttl))
+        return body
+
+    def add_hooks(self, on_request_start: RequestHook = None, on_request_end: RequestHook = None,
+                  on_error: ErrorHook = None) -> Callable[[], None]:
+        """Register tracing hooks; returns a callable that removes them again."""
+        if self.hooks is None:
+            self.hooks = RequestHooks()
+        hooks = self.hooks
+        added = [(hooks.on_request_start, on_request_start), (hooks.on_request_end, on_request_end),
+                 (hooks.on_error, on_error)]
+        for hook_list, hook in added:
+            if hook is not None:
+                hook_list.append(hook)
+
+        def remove():
+            for hook_list, hook in added:
+                if hook is not None and hook in hook_list:
+                    hook_list.remove(hook)
+            if self.hooks is hooks and not (hooks.on_request_start or hooks.on_request_end or hooks.on_error):
+                self.hooks = None
+
+        return remove
+
+    def invalidate_cache(self):
+        """Drop cached GET responses (e.g. before a forced refresh)."""
+        self._response_cache.clear()
+
+    async def _send_authorized(self, url: str, method: str, params: Dict[str, Any] = None,
+                               json: Dict[str, Any] = None, authorized: bool = True, endpoint: str = 'other',
+                               timeout: ClientTimeout = None, headers: Dict[str, str] = None,
+                               meta: Dict[str, Any] = None) -> Optional[bytes]:
+        policy = self.retry_policies.get(endpoint, self.retry_policy)
+        delays = policy.delays()
         while True:
-            headers = {'Authorization': f'JWT {self._token}'}
-            request_id = uuid4().hex
-            self._LOGGER.debug('Request=%s method=%s url=%s params=%s json=%s',
-                              request_id, method, url, params, json)
             try:
-                async with self.session.request(method, url, params=params, json=json, headers=headers) as response:
-                    if response.status == 401:
-                        raise UnauthorizedUfanetIntercomAPIError
-                    json_response = await response.json() if 199 < response.status < 500 else None
-                    if response.status in (200,):
-                        self._LOGGER.debug('Response=%s json_response=%s', request_id, json_response)
-                        return json_response
-                    self._LOGGER.error('Response=%s unsuccessful request json_response=%s status=%s reason=%s',
-                                       request_id, json_response, response.status, response.reason)
-                    if response.status == 400:
-                        raise BadRequestUfanetIntercomAPIError(json_response)
-                    raise UnknownUfanetIntercomAPIError(json_response)
-
-            except (JSONDecodeError, ContentTypeError) as e:
-                self._LOGGER.error('Response=%s unsuccessful request status=%s reason=%s error=%s',
-                                   request_id, response.status, response.reason, e)
-                raise UnknownUfanetIntercomAPIError(f'Unknown error: {response.status} {response.reason}')
-
-            except asyncio.exceptions.TimeoutError:
-                self._LOGGER.error('Response=%s TimeoutUfanetIntercomAPIError', request_id)
-                raise TimeoutUfanetIntercomAPIError('Timeout error')
-
-            except ClientConnectorError:
-                self._LOGGER.error('Response=%s ClientConnectorUfanetIntercomAPIError', request_id)
-                raise ClientConnectorUfanetIntercomAPIError('Client connector error')
-
-            except UnauthorizedUfanetIntercomAPIError:
-                self._LOGGER.error('Response=%s UnauthorizedUfanetIntercomAPIError, trying get jwt', request_id)
-                await self._prepare_token()
-                continue
+                return await self._send_once(url, method, params, json, authorized, endpoint, timeout, headers, meta)
+            except UfanetIntercomAPIError as e:
+                delay = next(delays, None) if policy.is_retryable(e) else None
+                retry_after = getattr(e, 'retry_after', None)
+                if retry_after is not None and delay is not None:
+                    # Honour the server's back-off; if it asks for longer than we would ever wait, give up now
+                    if retry_after > policy.max_delay:
+                        raise
+                    delay = max(delay, retry_after)
+                if delay is None:
+                    raise
+                self._LOGGER.warning('%s failed with %r, retrying in %.1fs', endpoint, e, delay)
+                self.metrics.record_retry(endpoint)
+                await asyncio.sleep(delay)
+
+    async def _send_once(self, url: str, method: str, params: Dict[str, Any] = None,
+                         json: Dict[str, Any] = None, authorized: bool = True, endpoint: str = 'other',
+                         timeout: ClientTimeout = None, headers: Dict[str, str] = None,
+                         meta: Dict[str, Any] = None) -> Optional[bytes]:
+        token = await self._tokens.async_get_token() if authorized else None
+        try:
+            return await self._do_request(url, method, params, json, token, endpoint, timeout, headers, meta)
+        except UnauthorizedUfanetIntercomAPIError:
+            if not authorized:
+                raise
+        # Token was rejected: refresh once (shared with concurrent callers) and retry once
+        self.metrics.record_retry(endpoint)
+        token = await self._tokens.async_refresh(stale=token)
+        return await self._do_request(url, method, params, json, token, endpoint, timeout, headers, meta)
+
+    async def _do_request(self, url: str, method: str, params: Dict[str, Any] = None, json: Dict[str, Any] = None,
+                          token: Token = None, endpoint: str = 'other', timeout: ClientTimeout = None,
+                          headers: Dict[str, str] = None,
+                          meta: Dict[str, Any] = None) -> Optional[bytes]:
+        request_class = REQUEST_CLASSES.get(endpoint, BACKGROUND)
+        # Wait for the rate limit first: a half-open probe must not sit in this queue
+        if request_class == BACKGROUND:
+            await self.rate_limiter.acquire()
+        self.circuit_breaker.before_call()
+        request_id = next(self._request_ids)
+        hooks = self.hooks
+        started = time.monotonic()
+        info = None
+        try:
+            if hooks is not None:
+                info = hooks.start(request_id, endpoint, method, url, params, json, started)
+            async with self.lanes.slot(request_class):
+                response = await self._request(url, method, params, json, token, timeout, headers, meta, request_id)
+        except RETRYABLE_ERRORS as e:
+            elapsed = time.monotonic() - started
+            self.circuit_breaker.record_failure(e)
+            self.metrics.record(endpoint, elapsed, e)
+            if info is not None:
+                hooks.error(info, elapsed, e)
+            raise
+        except BaseException as e:
+            # 4xx, bad JSON or cancellation say nothing about cloud health,
+            # but a cancelled half-open probe must still free the breaker
+            self.circuit_breaker.record_ignored()
+            if isinstance(e, Exception):
+                elapsed = time.monotonic() - started
+                self.metrics.record(endpoint, elapsed, e)
+                if info is not None:
+                    hooks.error(info, elapsed, e)
+            raise
+        elapsed = time.monotonic() - started
+        self.circuit_breaker.record_success()
+        self.metrics.record(endpoint, elapsed)
+        if info is not None:
+            hooks.end(info, elapsed)
+        return response
+
+    async def _request(self, url: str, method: str, params: Dict[str, Any] = None, json: Dict[str, Any] = None,
+                       token: Token = None, timeout: ClientTimeout = None, extra_headers: Dict[str, str] = None,
+                       meta: Dict[str, Any] = None, request_id: int = 0) -> Optional[bytes]:
+        headers = {'Authorization': f'JWT {TokenManager.header_value(token)}'} if token is not None else {}
+        if extra_headers:
+            headers.update(extra_headers)
+        if self._LOGGER.isEnabledFor(logging.DEBUG):
+            # The auth body carries the contract password: never log payloads unredacted
+            self._LOGGER.debug('Request=%s method=%s url=%s params=%s json=%s',
+                               request_id, method, url, params, redact(json))
+        try:
+            async with self.session.request(method, url, params=params, json=json, headers=headers,
+                                            timeout=timeout or self._timeout) as response:
+                if response.status == 401:
+                    self._LOGGER.error('Response=%s UnauthorizedUfanetIntercomAPIError', request_id)
+                    raise UnauthorizedUfanetIntercomAPIError
+                if meta is not None:
+                    meta['status'] = response.status
+                    meta['etag'] = response.headers.get('ETag')
+                    meta['last_modified'] = response.headers.get('Last-Modified')
+                if response.status == 304:
+                    self._LOGGER.debug('Response=%s not modified', request_id)
+                    return None
+                # The body is read once and returned undecoded: callers parse it straight into models
+                body = await response.read()
+                if response.status in (200,):
+                    if self._LOGGER.isEnabledFor(logging.DEBUG):
+                        self._LOGGER.debug('Response=%s bytes=%s body=%s', request_id, len(body),
+                                           _loggable_body(body))
+                    return body
+                if response.status == 429 or response.status >= 500:
+                    self._LOGGER.error('Response=%s server error status=%s reason=%s',
+                                       request_id, response.status, response.reason)
+                    raise ServerErrorUfanetIntercomAPIError(f'Server error: {response.status} {response.reason}',
+                                                            retry_after=_retry_after(response))
+                json_response = decode(body) if 199 < response.status < 500 else None
+                self._LOGGER.error('Response=%s unsuccessful request json_response=%s status=%s reason=%s',
+                                   request_id, json_response, response.status, response.reason)
+                if response.status == 400:
+                    raise BadRequestUfanetIntercomAPIError(json_response)
+                raise UnknownUfanetIntercomAPIError(json_response)
+
+        except JSONDecodeError as e:
+            self._LOGGER.error('Response=%s unsuccessful request status=%s reason=%s error=%s',
+                               request_id, response.status, response.reason, e)
+            raise UnknownUfanetIntercomAPIError(f'Unknown error: {response.status} {response.reason}')
+
+        except asyncio.exceptions.TimeoutError:
+            self._LOGGER.error('Response=%s TimeoutUfanetIntercomAPIError', request_id)
+            raise TimeoutUfanetIntercomAPIError('Timeout error')
+
+        except ClientConnectorError:
+            self._LOGGER.error('Response=%s ClientConnectorUfanetIntercomAPIError', request_id)
+            raise ClientConnectorUfanetIntercomAPIError('Client connector error')
+
+    @property
+    def token(self) -> Optional[Token]:
+        return self._tokens.token
+
+    @property
+    def has_valid_token(self) -> bool:
+        return self._tokens.is_valid
+
+    def export_token(self) -> Optional[Dict[str, Any]]:
+        """Current token with expiry metadata, for persistent storage."""
+        if self._tokens.token is None:
+            return None
+        return token_to_dict(self._tokens.token, self._tokens.expires_at)
+
+    def restore_token(self, data: Dict[str, Any]):
+        """Reuse a token saved by export_token (e.g. after a restart)."""
+        token, expires_at = token_from_dict(data)
+        self._tokens.set_token(token, expires_at)
+
+    def _token_updated(self, token: Token, expires_at: float):
+        if self._on_token_update is not None:
+            self._on_token_update(token_to_dict(token, expires_at))
 
     async def _prepare_token(self):
-        if self._token is None:
-            await self._set_token()
-        else:
-            try:
-                await self.token_verify()
-            except UnauthorizedUfanetIntercomAPIError:
-                await self._set_token()
+        """Make sure a usable token is present, logging in only if needed."""
+        await self._tokens.async_get_token()
 
-    async def _set_token(self):
+    async def _fetch_token(self) -> Token:
         url = urljoin(self._base_url, 'api/v1/auth/auth_by_contract/')
         json = {'contract': self._contract, 'password': self._password}
-        response = await self._send_request(url=url, method='POST', json=json)
-        self._token = Token(**response['token']).refresh
+        response = await self._send_request(url=url, method='POST', json=json, authorized=False,
+                                            endpoint='auth')
+        return Token(**response['token'])
+
+    async def _set_token(self):
+        await self._tokens.async_refresh(stale=self._tokens.token)
 
     async def token_verify(self):
+        token = await self._tokens.async_get_token()
         url = urljoin(self._base_url, 'api-token-verify/')
-        json = {'token': self._token}
-        await self._send_request(url=url, method='POST', json=json)
+        json = {'token': TokenManager.header_value(token)}
+        await self._send_request(url=url, method='POST', json=json, authorized=False, endpoint='token_verify')
 
     async def get_intercoms(self) -> List[Intercom]:
         url = urljoin(self._base_url, 'api/v0/skud/shared/')
-        response = await self._send_request(url=url)
-        return [Intercom(**i) for i in response]
+        body = await self._send_request(url=url, endpoint='get_intercoms', raw=True)
+        return await self._parse(self.parser.intercoms, body, self._cache_key(url, None))
 
-    async def open_intercom(self, intercom_id: int) -> bool:
+    async def open_intercom(self, intercom_id: int, timeout: float = None, hedge_after: float = None) -> bool:
+        """Open the door.
+
+        `timeout` is a separate (short) budget for the whole unlock, token refresh and
+        the wait for a connection slot included. With `hedge_after`, a second attempt is
+        started if the first one has not answered by then; the first answer wins.
+        """
         url = urljoin(self._base_url, f'api/v0/skud/shared/{intercom_id}/open/')
-        response = await self._send_request(url=url)
-        return response['result']
+        client_timeout = ClientTimeout(total=timeout) if timeout is not None else None
+
+        async def attempt():
+            response = await self._send_request(url=url, endpoint='open_intercom', timeout=client_timeout)
+            return response['result']
+
+        try:
+            async with asyncio.timeout(timeout):
+                if hedge_after is None:
+                    return await attempt()
+                return await self._hedged(attempt, hedge_after, 'open_intercom')
+        except TimeoutError:
+            self._LOGGER.error('open_intercom did not finish in %ss', timeout)
+            raise TimeoutUfanetIntercomAPIError('Unlock timeout')
+
+    async def _hedged(self, attempt: Callable[[], Awaitable[Any]], hedge_after: float, endpoint: str) -> Any:
+        first = asyncio.ensure_future(attempt())
+        pending = {first}
+        error = None
+        try:
+            # Cancelling the caller cancels every attempt still running: the door must not open later
+            done, _ = await asyncio.wait(pending, timeout=hedge_after)
+            if done:
+                return first.result()
+            self._LOGGER.debug('%s stalled for %ss, sending hedged request', endpoint, hedge_after)
+            self.metrics.record_retry(endpoint)
+            pending.add(asyncio.ensure_future(attempt()))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        return future.result()
+                    error = future.exception()
+            raise error
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def _parse(self, parse: Callable[[bytes], Any], body: bytes, cache_key: Tuple = None) -> Any:
+        """Parse small bodies inline and large pages in the executor.
+
+        A body that is not valid JSON of the expected shape is an UnknownUfanetIntercomAPIError
+        and is dropped from the response cache (`cache_key`), so the next call asks again.
+        """
+        try:
+            if len(body) < PARSE_IN_EXECUTOR_THRESHOLD:
+                return parse(body)
+            return await asyncio.get_running_loop().run_in_executor(None, parse, body)
+        except PARSE_ERRORS as e:
+            if cache_key is not None:
+                self._response_cache.pop(cache_key)
+            # pydantic lists every failed field: the first line ("N validation errors for ...") is enough
+            summary = str(e).partition('\n')[0]
+            self._LOGGER.error('Unparsable response body: %s', summary)
+            raise UnknownUfanetIntercomAPIError(f'Invalid response: {summary}')
+
+    async def warm_up(self, timeout: float = 5):
+        """Keep a pooled connection (and the token) warm with a cheap request."""
+        try:
+            await self._tokens.async_get_token()
+            async with self.lanes.slot(CONTROL), \
+                    self.session.head(self._base_url, timeout=ClientTimeout(total=timeout)) as response:
+                await response.read()
+        except (asyncio.exceptions.TimeoutError, ClientError, UfanetIntercomAPIError) as e:
+            self._LOGGER.debug('Warm-up request failed: %r', e)
 
     async def get_call_history(self, page: int = 1, page_size: int = 25) -> History:
         url = urljoin(self._base_url, 'api/v1/skuds/call-history/')
         params = {'page': page, 'page_size': page_size}
-        response = await self._send_request(url=url, params=params)
-        return History(**response)
+        body = await self._send_request(url=url, params=params, endpoint='get_call_history', raw=True)
+        return await self._parse(self.parser.history, body, self._cache_key(url, params))
+
+    async def iter_call_history(self, page_size: int = 25, prefetch: int = 4,
+                                max_pages: int = None) -> AsyncIterator[HistoryResult]:
+        """Yield calls newest first, fetching up to `prefetch` next pages concurrently.
+
+        At most `prefetch` pages are buffered, so memory stays flat on long backfills.
+        """
+        first = await self.get_call_history(page=1, page_size=page_size)
+        for result in first.results:
+            yield result
+        if not first.next:
+            return
+
+        total_pages = math.ceil(first.count / page_size)
+        if max_pages is not None:
+            total_pages = min(total_pages, max_pages)
+        pending: Deque[asyncio.Future] = deque()
+        next_page = 2
+        try:
+            while next_page <= total_pages or pending:
+                while next_page <= total_pages and len(pending) < prefetch:
+                    pending.append(asyncio.ensure_future(self.get_call_history(page=next_page, page_size=page_size)))
+                    next_page += 1
+                history = await pending.popleft()
+                for result in history.results:
+                    yield result
+                if not history.next:
+                    break
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def iter_call_history_ndjson(self, page_size: int = 25, prefetch: int = 4,
+                                       max_pages: int = None) -> AsyncIterator[str]:
+        """Full history backfill as NDJSON lines (one call per line)."""
+        async for result in self.iter_call_history(page_size=page_size, prefetch=prefetch, max_pages=max_pages):
+            yield model_to_json(result) + '\n'
 
     async def get_call_history_links(self, uuid: Union[UUID, str]) -> HistoryData:
+        key = str(uuid)
+        links = self._links_cache.get(key)
+        if links is not None:
+            return links
+        return await self._links_in_flight.run(key, lambda: self._fetch_call_history_links(key))
+
+    async def _fetch_call_history_links(self, uuid: str) -> HistoryData:
         url = urljoin(self._base_url, 'api/v1/cctv/history/')
-        json = {'uuid': str(uuid)}
-        response = await self._send_request(url=url, method='POST', json=json)
-        return HistoryData(**response)
+        json = {'uuid': uuid}
+        body = await self._send_request(url=url, method='POST', json=json, endpoint='get_call_history_links',
+                                        raw=True)
+        links = await self._parse(self.parser.history_data, body)
+        self._links_cache.set(uuid, links, ttl=links_ttl(links, LINKS_TTL))
+        return links
+
+    async def get_call_history_links_batch(self, uuids: Iterable[Union[UUID, str]],
+                                           concurrency: int = 4) -> Dict[str, HistoryData]:
+        """Resolve many calls at once; cached links cost no requests, failures are left out."""
+        semaphore = asyncio.Semaphore(concurrency)
+        result: Dict[str, HistoryData] = {}
+
+        async def resolve(uuid: str):
+            links = self._links_cache.get(uuid)
+            if links is None:
+                async with semaphore:
+                    try:
+                        links = await self.get_call_history_links(uuid)
+                    except UfanetIntercomAPIError as e:
+                        self._LOGGER.debug('Links for call %s are not available: %r', uuid, e)
+                        return
+            result[uuid] = links
+
+        await asyncio.gather(*(resolve(uuid) for uuid in dict.fromkeys(str(uuid) for uuid in uuids)))
+        return result
+
+    async def stream_media(self, url: str, chunk_size: int = 64 * 1024, offset: int = 0,
+                           timeout: ClientTimeout = None) -> AsyncIterator[bytes]:
+        """Stream a call preview or clip by its (signed) link on the shared session.
+
+        With `offset` the stream resumes from that byte (HTTP Range). If the server
+        ignores the range, the bytes before `offset` are skipped here, so the caller
+        always gets the rest of the file. The background slot is held until the
+        stream is consumed or closed.
+        """
+        started = time.monotonic()
+        headers = {'Range': f'bytes={offset}-'} if offset else None
+        try:
+            async with self.lanes.slot(BACKGROUND), \
+                    self.session.get(url, headers=headers, timeout=timeout or self._timeout) as response:
+                if offset and response.status == 416:
+                    # Nothing left after offset: the file is already complete
+                    return
+                if response.status == 429 or response.status >= 500:
+                    raise ServerErrorUfanetIntercomAPIError(f'Media request failed: {response.status} {response.reason}',
+                                                            retry_after=_retry_after(response))
+                if response.status not in (200, 206) or (response.status == 206 and not offset):
+                    raise UnknownUfanetIntercomAPIError(f'Media request failed: {response.status} {response.reason}')
+                skip = offset if response.status == 200 else 0
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    if skip:
+                        if len(chunk) <= skip:
+                            skip -= len(chunk)
+                            continue
+                        chunk, skip = chunk[skip:], 0
+                    yield chunk
+        except asyncio.exceptions.TimeoutError as e:
+            self.metrics.record('media', time.monotonic() - started, e)
+            raise TimeoutUfanetIntercomAPIError('Timeout error')
+        except ClientConnectorError as e:
+            self.metrics.record('media', time.monotonic() - started, e)
+            raise ClientConnectorUfanetIntercomAPIError('Client connector error')
+        except ClientError as e:
+            # Connection dropped mid-stream (payload error, server disconnect): resumable
+            self.metrics.record('media', time.monotonic() - started, e)
+            raise ClientConnectorUfanetIntercomAPIError(f'Media stream interrupted: {e!r}')
+        except UfanetIntercomAPIError as e:
+            self.metrics.record('media', time.monotonic() - started, e)
+            raise
+        self.metrics.record('media', time.monotonic() - started)
 
     async def close(self):
-        await self.session.close()
\ No newline at end of file
+        await self._tokens.close()
+        if self._owns_session:
+            await self.session.close()
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""Локальный архив истории звонков в SQLite."""
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Iterable, Optional, TypeVar
+
+_T = TypeVar("_T")
+
+SCHEMA_VERSION = 1
+
+# called_at - unix time для индексов и диапазонов, called_at_iso - время как его прислало облако
+COLUMNS = ("uuid", "entry_id", "called_at_iso", "house_id", "address", "porch", "flat",
+           "camera_number", "skud_mac", "timezone")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    uuid TEXT PRIMARY KEY,
+    entry_id TEXT NOT NULL,
+    called_at REAL NOT NULL,
+    called_at_iso TEXT NOT NULL,
+    house_id INTEGER,
+    address TEXT,
+    porch TEXT,
+    flat TEXT,
+    camera_number TEXT,
+    skud_mac TEXT,
+    timezone TEXT
+);
+CREATE INDEX IF NOT EXISTS calls_called_at ON calls (called_at);
+CREATE INDEX IF NOT EXISTS calls_camera_number ON calls (camera_number, called_at);
+CREATE INDEX IF NOT EXISTS calls_skud_mac ON calls (skud_mac, called_at);
+CREATE INDEX IF NOT EXISTS calls_house_id ON calls (house_id, called_at);
+"""
+
+
+def _timestamp(value: datetime) -> float:
+    return value.timestamp()
+
+
+class CallArchive:
+    """
+        Звонки всех договоров в одной базе с индексами по времени, камере, СКУД и дому.
+        Все обращения к базе идут через один поток executor (соединение SQLite привязано
+        к потоку), event loop только ждет результат. Старше max_age_days и сверх
+        max_calls звонки удаляются при каждой записи.
+        Модуль не зависит от HA и остального пакета, чтобы его можно было гонять в bench.py.
+    """
+
+    def __init__(self, path: str, max_age_days: float, max_calls: int):
+        self.path = path
+        self._max_age = max_age_days * 86400
+        self._max_calls = max_calls
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._connection: Optional[sqlite3.Connection] = None
+        # Число звонков в базе, чтобы не пересчитывать его при каждой записи
+        self._count = 0
+
+    # --- Методы потока архива ---
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            self._count = connection.execute("SELECT count(*) FROM calls").fetchone()[0]
+            self._connection = connection
+        return self._connection
+
+    def add(self, entry_id: str, calls: Iterable[Any]) -> int:
+        """Записать звонки (повторы по uuid пропускаются) и применить ограничения хранения."""
+        rows = [(call.uuid, entry_id, _timestamp(call.called_at), call.called_at.isoformat(), call.house_id,
+                 call.address, call.porch, call.flat, call.camera_number, call.skud_mac, call.timezone)
+                for call in calls]
+        connection = self._connect()
+        with connection:
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO calls (uuid, entry_id, called_at, called_at_iso, house_id, address, porch, "
+                "flat, camera_number, skud_mac, timezone) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            added = connection.total_changes - before
+            self._count += added
+            if added:
+                self._prune(connection)
+        return added
+
+    def _prune(self, connection: sqlite3.Connection) -> None:
+        self._count -= connection.execute("DELETE FROM calls WHERE called_at < ?",
+                                          (time.time() - self._max_age,)).rowcount
+        if self._count <= self._max_calls:
+            return
+        # Самый старый звонок, который еще помещается в лимит; все старше него - лишние
+        row = connection.execute("SELECT called_at FROM calls ORDER BY called_at DESC LIMIT 1 OFFSET ?",
+                                 (self._max_calls - 1,)).fetchone()
+        if row is not None:
+            self._count -= connection.execute("DELETE FROM calls WHERE called_at < ?", (row[0],)).rowcount
+
+    def query(self, entry_id: Optional[str] = None, since: Optional[datetime] = None,
+              until: Optional[datetime] = None, camera_number: Optional[str] = None,
+              skud_mac: Optional[str] = None, house_id: Optional[int] = None,
+              limit: int = 100) -> list[dict[str, Any]]:
+        """Звонки по фильтрам, от новых к старым. until не включается, им удобно листать назад."""
+        conditions, params = [], []
+        for column, value in (("entry_id", entry_id), ("camera_number", camera_number),
+                              ("skud_mac", skud_mac), ("house_id", house_id)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("called_at >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            conditions.append("called_at < ?")
+            params.append(_timestamp(until))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(limit)
+        cursor = self._connect().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM calls {where} ORDER BY called_at DESC LIMIT ?", params)
+        return [{("called_at" if name == "called_at_iso" else name): value for name, value in zip(COLUMNS, row)}
+                for row in cursor]
+
+    def remove_entry(self, entry_id: str) -> None:
+        connection = self._connect()
+        with connection:
+            self._count -= connection.execute("DELETE FROM calls WHERE entry_id = ?", (entry_id,)).rowcount
+
+    def stats(self) -> dict[str, Any]:
+        oldest, newest = self._connect().execute("SELECT min(called_at), max(called_at) FROM calls").fetchone()
+        return {"calls": self._count, "oldest": oldest, "newest": newest,
+                "max_calls": self._max_calls, "max_age_days": self._max_age / 86400}
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    # --- Асинхронные обертки для event loop ---
+
+    async def _async_run(self, func: Callable[..., _T], *args: Any, **kwargs: Any) -> _T:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hekus_doorphone_archive")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, lambda: func(*args, **kwargs))
+
+    async def async_add(self, entry_id: str, calls: list[Any]) -> int:
+        if not calls:
+            return 0
+        return await self._async_run(self.add, entry_id, calls)
+
+    async def async_query(self, **filters: Any) -> list[dict[str, Any]]:
+        return await self._async_run(self.query, **filters)
+
+    async def async_remove_entry(self, entry_id: str) -> None:
+        await self._async_run(self.remove_entry, entry_id)
+
+    async def async_stats(self) -> dict[str, Any]:
+        return await self._async_run(self.stats)
+
+    async def async_close(self) -> None:
+        if self._executor is None:
+            return
+        await self._async_run(self.close)
+        self._executor.shutdown(wait=False)
+        self._executor = None
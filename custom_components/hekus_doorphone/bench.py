@@ -0,0 +1,545 @@
+"""Бенчмарк клиента UfanetIntercomAPI против локального сервера (fake_server.py).
+
+Запуск из папки интеграции (как test.py):
+
+    python bench.py --requests 200
+    python bench.py --cert cert.pem --key key.pem   # с TLS, чтобы увидеть цену рукопожатия
+    python bench.py --scenario history --calls 2000 --latency 0.05
+    python bench.py --scenario unlock --requests 500 --concurrency 20 --latency 0.05 --jitter 0.2 --hedge-after 0.15
+    python bench.py --scenario unlock --requests 100 --concurrency 2 --latency 0.05 --background 8
+    python bench.py --scenario churn --duration 10 --revoke-every 0.5 --error-rate 0.02
+    python bench.py --scenario parsing --repeat 2000   # разбор моделей из байтов, без сервера
+    python bench.py --scenario imports                 # время импорта с бюджетом (код выхода 1 при превышении)
+    python bench.py --scenario archive --calls 100000  # запись и запросы к локальному архиву звонков
+    python bench.py --scenario races --repeat 200      # гонки отмены в полосах, брейкере и токене (код выхода 1)
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import random
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from collections import Counter
+from datetime import timedelta
+from itertools import count, cycle
+from pathlib import Path
+
+from aiohttp import ClientSession, TraceConfig
+
+from api.lanes import BACKGROUND, CLASSES, CONTROL, INTERACTIVE, PriorityLanes
+from api.parsing import ModelParser
+from api.models import Token, model_to_dict
+from api.token_manager import TokenManager
+from api.resilience import TokenBucket
+from api.session import create_connector
+from api.ufanet_api import UfanetIntercomAPI
+from api.exceptions import UfanetIntercomAPIError
+from archive import CallArchive
+from fake_server import SAMPLE_INTERCOMS, FakeUfanetServer, make_history_page
+
+INTERCOM_ID = SAMPLE_INTERCOMS[0]['id']
+# Задержка сервера по умолчанию: истории нужна, чтобы было что распараллеливать
+DEFAULT_LATENCY = {'history': 0.02}
+
+def counting_trace() -> tuple[TraceConfig, dict]:
+    stats = {'connections': 0}
+
+    async def on_connection_create_end(session, ctx, params):
+        stats['connections'] += 1
+
+    trace = TraceConfig()
+    trace.on_connection_create_end.append(on_connection_create_end)
+    return trace, stats
+
+
+async def run_fresh(base_url: str, requests: int, client_ssl) -> tuple[float, int]:
+    """Старое поведение: новая сессия (и новое соединение) на каждый клиент."""
+    trace, stats = counting_trace()
+    started = time.perf_counter()
+    for _ in range(requests):
+        session = ClientSession(connector=create_connector(client_ssl), trace_configs=[trace])
+        api = UfanetIntercomAPI(contract='1', password='1', session=session, base_url=base_url)
+        await api.open_intercom(intercom_id=INTERCOM_ID)
+        await session.close()
+    return time.perf_counter() - started, stats['connections']
+
+
+async def run_pooled(base_url: str, requests: int, client_ssl) -> tuple[float, int]:
+    """Одна сессия на тюнингованном коннекторе, соединения переиспользуются."""
+    trace, stats = counting_trace()
+    session = ClientSession(connector=create_connector(client_ssl), trace_configs=[trace])
+    api = UfanetIntercomAPI(contract='1', password='1', session=session, base_url=base_url)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await api.open_intercom(intercom_id=INTERCOM_ID)
+    elapsed = time.perf_counter() - started
+    await session.close()
+    return elapsed, stats['connections']
+
+
+async def run_history_serial(api: UfanetIntercomAPI) -> int:
+    """Старое поведение: страницы по одной, следующая после предыдущей."""
+    page, total = 1, 0
+    while True:
+        history = await api.get_call_history(page=page)
+        total += len(history.results)
+        if not history.next:
+            return total
+        page += 1
+
+
+async def run_history_prefetch(api: UfanetIntercomAPI, prefetch: int) -> int:
+    total = 0
+    async for _ in api.iter_call_history(prefetch=prefetch):
+        total += 1
+    return total
+
+
+def unlimited_api(base_url: str, **kwargs) -> UfanetIntercomAPI:
+    # Клиентский rate limit (5 rps) иначе измерял бы сам себя, а не клиент и сервер
+    return UfanetIntercomAPI(contract='1', password='1', base_url=base_url,
+                             rate_limiter=TokenBucket(rate=10_000, capacity=10_000), **kwargs)
+
+
+async def bench_history(base_url: str, args: argparse.Namespace):
+    api = unlimited_api(base_url)
+    try:
+        for name, coro_func in (('serial', lambda: run_history_serial(api)),
+                                (f'prefetch={args.prefetch}', lambda: run_history_prefetch(api, args.prefetch))):
+            # Иначе второй прогон читает страницы из кэша ответов первого
+            api.invalidate_cache()
+            started = time.perf_counter()
+            total = await coro_func()
+            elapsed = time.perf_counter() - started
+            print(f'{name:>11}: {total} calls in {elapsed * 1000:.1f} ms')
+    finally:
+        await api.close()
+
+
+async def run_load(request, concurrency: int, requests: int = None,
+                   duration: float = None) -> tuple[list[float], float, Counter]:
+    """request(i) в `concurrency` потоков, `requests` раз или `duration` секунд.
+
+    Возвращает задержки (с), общее время и ошибки по типам.
+    """
+    latencies: list[float] = []
+    errors: Counter = Counter()
+    counter = iter(range(requests)) if requests is not None else count()
+    deadline = time.monotonic() + duration if duration is not None else None
+
+    async def worker():
+        for i in counter:
+            if deadline is not None and time.monotonic() > deadline:
+                return
+            started = time.perf_counter()
+            try:
+                await request(i)
+            except (UfanetIntercomAPIError, asyncio.TimeoutError) as e:
+                errors[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started, errors
+
+
+def report(name: str, latencies: list[float], elapsed: float, errors: Counter):
+    latencies = sorted(latencies)
+
+    def pct(q: float) -> float:
+        return latencies[min(len(latencies) - 1, int(q / 100 * len(latencies)))] * 1000
+
+    print(f'{name:>8}: {len(latencies)} requests in {elapsed:.2f} s = {len(latencies) / elapsed:.0f} req/s, '
+          f'p50 {pct(50):.1f} / p95 {pct(95):.1f} / p99 {pct(99):.1f} / max {latencies[-1] * 1000:.1f} ms'
+          + (f', errors {dict(errors)}' if errors else ''))
+
+
+async def run_background_sync(api: UfanetIntercomAPI, workers: int):
+    """Фоновая нагрузка до отмены: полная выгрузка истории и скачивание превью в `workers` потоков."""
+
+    async def worker(i: int):
+        while True:
+            if i % 2:
+                # Свой размер страницы у каждого потока, иначе одинаковые запросы объединяются
+                api.invalidate_cache()
+                async for _ in api.iter_call_history(page_size=20 + i, prefetch=4):
+                    pass
+            else:
+                async for _ in api.stream_media(f'{api._base_url}media/{i}.jpg'):
+                    pass
+
+    await asyncio.gather(*(worker(i) for i in range(workers)))
+
+
+# Без полос: все классы без ограничений, порядок выдачи соединений решает пул aiohttp
+NO_LANES = {INTERACTIVE: 10_000, CONTROL: 10_000, BACKGROUND: 10_000}
+
+
+async def bench_unlock(server: FakeUfanetServer, args: argparse.Namespace):
+    """Одновременные открытия: пропускная способность и хвосты задержки (с хеджированием и без).
+
+    С --background N открытия идут на фоне тяжелой синхронизации истории и медиа,
+    с приоритетными полосами и без них.
+    """
+    ids = cycle([intercom['id'] for intercom in server.intercoms])
+    variants = [('plain', None, None)] + ([('hedged', args.hedge_after, None)] if args.hedge_after else [])
+    if args.background:
+        variants = [(f'{name}/lanes', hedge_after, PriorityLanes()) for name, hedge_after, _ in variants] + \
+                   [(f'{name}/none', hedge_after, PriorityLanes(capacity=10_000, reserved=0, limits=NO_LANES))
+                    for name, hedge_after, _ in variants]
+    for name, hedge_after, lanes in variants:
+        api = unlimited_api(server.base_url, lanes=lanes)
+        background = None
+        try:
+            await api._prepare_token()
+            if args.background:
+                background = asyncio.ensure_future(run_background_sync(api, args.background))
+                await asyncio.sleep(0.5)
+            latencies, elapsed, errors = await run_load(
+                lambda i: api.open_intercom(next(ids), timeout=args.unlock_timeout, hedge_after=hedge_after),
+                args.concurrency, requests=args.requests)
+            report(name, latencies, elapsed, errors)
+            if lanes is not None and lanes.capacity < 10_000:
+                print(f'{"":>8}  background passed over {lanes.preempted} times')
+        finally:
+            if background is not None:
+                background.cancel()
+                await asyncio.gather(background, return_exceptions=True)
+            await api.close()
+
+
+async def bench_churn(server: FakeUfanetServer, args: argparse.Namespace):
+    """Смешанная нагрузка, пока сервер отзывает токены каждые --revoke-every с: сколько логинов на сколько 401.
+
+    Короткий --token-lifetime (меньше 30 с запаса клиента) дает логин на каждый запрос, отзыв - честные 401.
+    """
+    api = unlimited_api(server.base_url)
+    calls = (lambda: api.open_intercom(INTERCOM_ID, timeout=args.unlock_timeout),
+             api.get_intercoms,
+             lambda: api.get_call_history(page=1))
+
+    async def revoke():
+        while True:
+            await asyncio.sleep(args.revoke_every)
+            server.expire_tokens()
+
+    revoker = asyncio.ensure_future(revoke())
+    try:
+        latencies, elapsed, errors = await run_load(lambda i: calls[i % len(calls)](), args.concurrency,
+                                                    duration=args.duration)
+        report('churn', latencies, elapsed, errors)
+    finally:
+        revoker.cancel()
+        await api.close()
+    print(f'{"server":>8}: logins {server.stats["auth"]}, 401 responses '
+          f'{sum(statuses[401] for statuses in server.statuses.values())}, '
+          f'503 responses {sum(statuses[503] for statuses in server.statuses.values())}')
+
+
+def _dumped(value):
+    return [model_to_dict(item) for item in value] if isinstance(value, list) else model_to_dict(value)
+
+
+def bench_parsing(args: argparse.Namespace):
+    """Разбор реалистичных ответов из байтов тела.
+
+    legacy  - как раньше: json.loads в dict, затем pydantic из dict;
+    strict  - валидация pydantic прямо из байтов;
+    trusted - orjson (если есть) и __slots__ записи без валидации.
+    """
+    payloads = (
+        ('intercoms x3', 'intercoms', SAMPLE_INTERCOMS),
+        ('history 25', 'history', make_history_page(25, 25)),
+        ('history 500', 'history', make_history_page(500, 500)),
+    )
+    strict, trusted = ModelParser(), ModelParser(trusted=True)
+    for label, method, payload in payloads:
+        body = json.dumps(payload).encode()
+        # Быстрые записи должны совпадать с моделями pydantic поле в поле
+        assert _dumped(getattr(trusted, method)(body)) == _dumped(getattr(strict, method)(body)), label
+        modes = (
+            ('legacy', lambda: getattr(strict, method)(json.loads(body))),
+            ('strict', lambda: getattr(strict, method)(body)),
+            ('trusted', lambda: getattr(trusted, method)(body)),
+        )
+        timings = {}
+        for mode, parse in modes:
+            best = min(timeit.repeat(parse, number=args.repeat, repeat=5))
+            timings[mode] = best / args.repeat * 1e6
+        print(f'{label:>13} ({len(body)} B): ' + ', '.join(f'{mode} {value:.1f} us' for mode, value in timings.items())
+              + f' (x{timings["legacy"] / timings["trusted"]:.1f})')
+
+
+def bench_archive(args: argparse.Namespace):
+    """Архив звонков: запись страницами по 25 (как при опросе) и типовые запросы по индексам."""
+    calls = ModelParser(trusted=True).history(make_history_page(args.calls, args.calls)).results
+    calls.reverse()
+    intercom = SAMPLE_INTERCOMS[0]
+    newest = calls[-1].called_at
+    with tempfile.TemporaryDirectory() as directory:
+        archive = CallArchive(os.path.join(directory, 'calls.db'), max_age_days=36500, max_calls=args.calls)
+        started = time.perf_counter()
+        for offset in range(0, len(calls), 25):
+            archive.add('entry', calls[offset:offset + 25])
+        elapsed = time.perf_counter() - started
+        print(f'{"add":>14}: {len(calls)} calls in {elapsed * 1000:.0f} ms '
+              f'({elapsed / -(-len(calls) // 25) * 1000:.2f} ms per page of 25)')
+        queries = (
+            ('latest 100', {}),
+            ('camera, 50', {'camera_number': intercom['cctv_number'], 'limit': 50}),
+            ('skud_mac, 50', {'skud_mac': f'mac{intercom["id"]}', 'limit': 50}),
+            ('house, week', {'house_id': intercom['house'], 'since': newest - timedelta(days=7), 'limit': 1000}),
+            ('page at 90%', {'until': calls[len(calls) // 10].called_at, 'limit': 100}),
+        )
+        repeat = min(args.repeat, 200)
+        for label, filters in queries:
+            rows = len(archive.query(**filters))
+            best = min(timeit.repeat(lambda: archive.query(**filters), number=repeat, repeat=3))
+            print(f'{label:>14}: {best / repeat * 1000:.3f} ms ({rows} rows)')
+        archive.close()
+
+
+COMPONENT_DIR = Path(__file__).resolve().parent
+PACKAGE = f'custom_components.{COMPONENT_DIR.name}'
+# (модуль, бюджет собственного времени импорта наших модулей в мс, модули, которые он не должен загружать).
+# Считается только self time модулей интеграции: стоимость самого HA сюда не входит.
+IMPORT_BUDGETS = (
+    (PACKAGE, 10, ('pydantic', f'{PACKAGE}.api.ufanet_api', f'{PACKAGE}.manager')),
+    (f'{PACKAGE}.config_flow', 15, ('pydantic', f'{PACKAGE}.api.ufanet_api', f'{PACKAGE}.device')),
+    ('api.exceptions', 2, ('pydantic', 'aiohttp')),
+    ('api.ufanet_api', 40, ()),
+)
+
+
+def measure_import(module: str, forbidden: tuple[str, ...]) -> tuple[float, list[str]]:
+    """Импорт в чистом интерпретаторе с -X importtime: (self time наших модулей в мс, загруженные запрещенные)."""
+    code = f'import json, sys, {module}; print(json.dumps([m for m in {list(forbidden)!r} if m in sys.modules]))'
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join((str(COMPONENT_DIR.parents[1]), str(COMPONENT_DIR)))}
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, env=env, check=True)
+    own = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        if name == 'api' or name.startswith(('api.', PACKAGE)):
+            own += int(self_us)
+    return own / 1000, json.loads(result.stdout)
+
+
+async def _lanes_cancel_then_release() -> str | None:
+    """Отмена ждущего и release() в одной итерации loop: ждущий должен получить CancelledError."""
+    lanes = PriorityLanes(capacity=2, reserved=1)
+    await lanes.acquire(BACKGROUND)
+    waiter = asyncio.ensure_future(lanes.acquire(BACKGROUND))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    lanes.release(BACKGROUND)
+    try:
+        await waiter
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        return f'waiter raised {e!r}'
+    if lanes._in_use or any(lanes._waiters.values()):
+        return f'leaked slots {lanes.as_dict()}'
+    return None
+
+
+async def _lanes_granted_then_cancelled() -> str | None:
+    """Слот выдан и ждущий отменен в той же итерации: слот переходит следующему."""
+    lanes = PriorityLanes(capacity=2, reserved=1)
+    await lanes.acquire(BACKGROUND)
+    first = asyncio.ensure_future(lanes.acquire(BACKGROUND))
+    second = asyncio.ensure_future(lanes.acquire(BACKGROUND))
+    await asyncio.sleep(0)
+    lanes.release(BACKGROUND)
+    first.cancel()
+    await asyncio.gather(first, return_exceptions=True)
+    await asyncio.wait_for(second, 1)
+    lanes.release(BACKGROUND)
+    return f'leaked slots {lanes.as_dict()}' if lanes._in_use else None
+
+
+async def _lanes_stress(rounds: int, rng: random.Random) -> str | None:
+    """Случайные классы, удержания и отмены: лимиты не превышаются, в конце все слоты свободны."""
+    lanes = PriorityLanes(capacity=4, reserved=1)
+    peak = {'in_use': 0}
+
+    async def worker(request_class: str):
+        async with lanes.slot(request_class):
+            peak['in_use'] = max(peak['in_use'], lanes._in_use)
+            if lanes.active[request_class] > lanes.limits[request_class]:
+                raise AssertionError(f'{request_class} over its limit: {lanes.as_dict()}')
+            await asyncio.sleep(rng.random() * 0.002)
+
+    tasks = [asyncio.ensure_future(worker(rng.choice(CLASSES))) for _ in range(rounds)]
+    for task in tasks:
+        if rng.random() < 0.3:
+            await asyncio.sleep(0)
+            task.cancel()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    errors = [r for r in results if isinstance(r, Exception)]
+    if errors:
+        return f'{len(errors)} workers failed, first: {errors[0]!r}'
+    if peak['in_use'] > lanes.capacity or lanes._in_use or any(lanes.active.values()) \
+            or any(lanes._waiters.values()):
+        return f'peak {peak["in_use"]}, left {lanes.as_dict()}'
+    return None
+
+
+async def _breaker_cancelled_probe() -> str | None:
+    """Отмененный пробный запрос в half-open не должен навсегда заклинить брейкер."""
+    api = UfanetIntercomAPI(contract='1', password='1', rate_limiter=TokenBucket(rate=10_000, capacity=10_000))
+    try:
+        breaker = api.circuit_breaker
+        breaker.state = breaker.HALF_OPEN
+
+        async def hang(*_args, **_kwargs):
+            await asyncio.sleep(10)
+
+        api._request = hang
+        probe = asyncio.ensure_future(api._do_request('http://127.0.0.1:9/', 'GET'))
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+        return 'probe still marked in flight' if breaker._probe_in_flight else None
+    finally:
+        await api.close()
+
+
+async def _token_single_flight() -> str | None:
+    """Один логин на всех ждущих; отмена того, кто логинится, не ломает остальных."""
+    fetches = count(1)
+
+    async def fetch() -> Token:
+        number = next(fetches)
+        await asyncio.sleep(0.01)
+        return Token(access=f'a{number}', refresh=f'r{number}', exp=int(time.time()) + 3600)
+
+    tokens = TokenManager(fetch)
+    callers = [asyncio.ensure_future(tokens.async_get_token()) for _ in range(20)]
+    await asyncio.sleep(0.005)
+    callers[0].cancel()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+    await tokens.close()
+    got = {result.refresh for result in results[1:] if isinstance(result, Token)}
+    logins = next(fetches) - 1
+    if len(got) != 1 or logins > 2:
+        return f'tokens {got}, logins {logins}, results {results[1:3]}'
+    return None
+
+
+def bench_races(args: argparse.Namespace) -> int:
+    """Гонки отмены в общих примитивах клиента; код выхода 1, если хоть одна проверка упала."""
+    rng = random.Random(1)
+    checks = (
+        ('lanes: cancel + release', _lanes_cancel_then_release),
+        ('lanes: grant + cancel', _lanes_granted_then_cancelled),
+        ('lanes: stress', lambda: _lanes_stress(args.repeat, rng)),
+        ('breaker: cancelled probe', _breaker_cancelled_probe),
+        ('token: single flight', _token_single_flight),
+    )
+    failed = 0
+    for name, check in checks:
+        error = asyncio.run(check())
+        print(f'{name:>26}: {"ok" if error is None else "FAIL " + error}')
+        failed += error is not None
+    return 1 if failed else 0
+
+
+def bench_imports(args: argparse.Namespace) -> int:
+    has_homeassistant = importlib.util.find_spec('homeassistant') is not None
+    failed = 0
+    for module, budget, forbidden in IMPORT_BUDGETS:
+        if module.startswith(PACKAGE) and not has_homeassistant:
+            print(f'{module:>45}: skipped (homeassistant is not installed)')
+            continue
+        # Лучший из нескольких запусков, чтобы не ловить шум диска и планировщика
+        runs = [measure_import(module, forbidden) for _ in range(args.import_runs)]
+        own = min(run[0] for run in runs)
+        loaded = runs[0][1]
+        ok = own <= budget and not loaded
+        failed += not ok
+        print(f'{module:>45}: {own:6.1f} ms (budget {budget} ms)'
+              + (f', loads {", ".join(loaded)}' if loaded else '') + ('' if ok else '  FAIL'))
+    return 1 if failed else 0
+
+
+async def main(args: argparse.Namespace):
+    server_ssl = None
+    client_ssl = None
+    if args.cert:
+        server_ssl = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        server_ssl.load_cert_chain(args.cert, args.key)
+        client_ssl = ssl.create_default_context(cafile=args.cert)
+        client_ssl.check_hostname = False
+
+    latency = args.latency if args.latency is not None else DEFAULT_LATENCY.get(args.scenario, 0.0)
+    server = FakeUfanetServer(calls=args.calls, latency=latency, jitter=args.jitter,
+                              token_lifetime=args.token_lifetime, error_rate=args.error_rate)
+    base_url = await server.start(port=args.port, ssl_context=server_ssl)
+
+    try:
+        if args.scenario == 'history':
+            await bench_history(base_url, args)
+        elif args.scenario == 'unlock':
+            await bench_unlock(server, args)
+        elif args.scenario == 'churn':
+            await bench_churn(server, args)
+        else:
+            for name, runner_func in (('fresh', run_fresh), ('pooled', run_pooled)):
+                elapsed, connections = await runner_func(base_url, args.requests, client_ssl)
+                print(f'{name:>7}: {args.requests} requests in {elapsed * 1000:.1f} ms '
+                      f'({elapsed / args.requests * 1000:.3f} ms/req), connections opened: {connections}')
+    finally:
+        await server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--scenario', choices=('connections', 'history', 'unlock', 'churn', 'parsing', 'imports',
+                                               'archive', 'races'),
+                        default='connections')
+    parser.add_argument('--calls', type=int, default=1000, help='размер синтетической истории звонков')
+    parser.add_argument('--latency', type=float, help='задержка ответа сервера, с (history: 0.02, иначе 0)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='случайная добавка к задержке сервера, с')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='доля случайных ответов 503')
+    parser.add_argument('--token-lifetime', type=float, default=3600, help='срок жизни токена на сервере, с')
+    parser.add_argument('--concurrency', type=int, default=10, help='одновременных запросов в unlock/churn')
+    parser.add_argument('--duration', type=float, default=5, help='длительность churn, с')
+    parser.add_argument('--revoke-every', type=float, default=1.0, help='churn: сервер отзывает токены раз в N с')
+    parser.add_argument('--verbose', action='store_true', help='показывать логи клиента')
+    parser.add_argument('--unlock-timeout', type=float, default=5, help='таймаут попытки открытия, с')
+    parser.add_argument('--hedge-after', type=float, help='в unlock также прогнать открытие с хеджированием')
+    parser.add_argument('--background', type=int, default=0,
+                        help='unlock: фоновых потоков выгрузки истории и медиа (сравнение с полосами и без)')
+    parser.add_argument('--prefetch', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=1000, help='повторов на замер в сценарии parsing')
+    parser.add_argument('--import-runs', type=int, default=5, help='запусков интерпретатора на модуль в imports')
+    parser.add_argument('--cert', help='PEM сертификат для TLS режима')
+    parser.add_argument('--key', help='PEM ключ для TLS режима')
+    arguments = parser.parse_args()
+    # Ошибки, которые сценарии провоцируют сами, иначе засыпают вывод
+    logging.basicConfig(level=logging.DEBUG if arguments.verbose else logging.CRITICAL)
+    if arguments.scenario == 'parsing':
+        bench_parsing(arguments)
+    elif arguments.scenario == 'imports':
+        sys.exit(bench_imports(arguments))
+    elif arguments.scenario == 'archive':
+        bench_archive(arguments)
+    elif arguments.scenario == 'races':
+        sys.exit(bench_races(arguments))
+    else:
+        asyncio.run(main(arguments))
@@ -0,0 +1,194 @@
+"""Локальный снимок списка домофонов с фоновой сверкой с облаком."""
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, TypeVar
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, CONF_LOGGER_NAME
+from .api.ufanet_api import UfanetIntercomAPI
+from .api.models import HistoryResult, model_to_dict
+from .device import DoorPhoneDevice
+
+_LOGGER = logging.getLogger(CONF_LOGGER_NAME)
+
+STORAGE_VERSION = 1
+
+CatalogListener = Callable[[List[DoorPhoneDevice], List[DoorPhoneDevice], List[DoorPhoneDevice]], None]
+_EntityT = TypeVar("_EntityT", bound=Entity)
+
+
+class IntercomCatalog:
+    """
+        Список домофонов договора.
+        При старте поднимается из локального снимка, затем сверяется с api/v0/skud/shared/
+        и сообщает подписчикам только о добавленных, удаленных и измененных домофонах.
+        Держит индекс звонок -> домофон, пересобираемый при каждом изменении списка.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, api: UfanetIntercomAPI):
+        self._hass = hass
+        self._api = api
+        self._store: Store[Dict[str, Any]] = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.intercoms")
+        self._listeners: List[CatalogListener] = []
+        # id домофона -> устройство
+        self.devices: Dict[int, DoorPhoneDevice] = {}
+        self.fetched_at: float | None = None
+        self._persisted = False
+        # Индекс для звонков: camera_number звонка совпадает с cctv_number домофона
+        self._by_camera: Dict[str, DoorPhoneDevice] = {}
+        # Дома с единственным домофоном: запасной путь, если камеры у звонка нет в индексе
+        self._by_house: Dict[int, DoorPhoneDevice] = {}
+        # skud_mac -> домофон, запоминаются по звонкам, опознанным по камере
+        self._by_skud_mac: Dict[str, DoorPhoneDevice] = {}
+
+    def _reindex(self) -> None:
+        self._by_camera = {device._intercom.cctv_number: device for device in self.devices.values()}
+        by_house: Dict[int, Optional[DoorPhoneDevice]] = {}
+        for device in self.devices.values():
+            house = device._intercom.house
+            by_house[house] = None if house in by_house else device
+        self._by_house = {house: device for house, device in by_house.items() if device is not None}
+        self._by_skud_mac = {}
+
+    def device_for_call(self, call: HistoryResult) -> Optional[DoorPhoneDevice]:
+        """Домофон, в который пришел звонок (None, если не удалось опознать). O(1)."""
+        device = self._by_camera.get(call.camera_number)
+        if device is not None:
+            if call.skud_mac and call.skud_mac not in self._by_skud_mac:
+                self._by_skud_mac[call.skud_mac] = device
+            return device
+        device = self._by_skud_mac.get(call.skud_mac)
+        if device is not None:
+            return device
+        return self._by_house.get(call.house_id)
+
+    def latest_calls(self, calls: Iterable[HistoryResult]) -> Dict[int, HistoryResult]:
+        """Последний звонок каждого домофона (id домофона -> звонок) за один проход; calls - от новых к старым."""
+        latest: Dict[int, HistoryResult] = {}
+        for call in calls:
+            device = self.device_for_call(call)
+            if device is not None and device._intercom.id not in latest:
+                latest[device._intercom.id] = call
+        return latest
+
+    def latest_call(self, device: DoorPhoneDevice, calls: Iterable[HistoryResult]) -> Optional[HistoryResult]:
+        """Последний звонок в домофон; calls - от новых к старым."""
+        for call in calls:
+            if self.device_for_call(call) is device:
+                return call
+        return None
+
+    async def async_load(self) -> bool:
+        """Поднять домофоны из снимка. False, если снимка нет."""
+        data = await self._store.async_load()
+        if not data:
+            return False
+        try:
+            # Тот же режим разбора, что и у ответов облака, чтобы сравнение со свежим списком было честным
+            intercoms = self._api.parser.intercoms(data["intercoms"])
+        except Exception as err:
+            _LOGGER.warning("Ignoring broken intercom snapshot: %s", err)
+            return False
+        self.devices = {intercom.id: DoorPhoneDevice(intercom) for intercom in intercoms}
+        self._reindex()
+        self.fetched_at = data.get("fetched_at")
+        self._persisted = True
+        return True
+
+    async def async_refresh(self) -> None:
+        """Загрузить список из облака и применить только разницу."""
+        intercoms = await self._api.get_intercoms()
+        fresh = {intercom.id: intercom for intercom in intercoms}
+
+        added = [DoorPhoneDevice(intercom) for intercom_id, intercom in fresh.items()
+                 if intercom_id not in self.devices]
+        removed = [device for intercom_id, device in self.devices.items() if intercom_id not in fresh]
+        updated = []
+        for intercom_id, device in self.devices.items():
+            intercom = fresh.get(intercom_id)
+            if intercom is not None and intercom != device._intercom:
+                device.update(intercom)
+                updated.append(device)
+
+        for device in removed:
+            del self.devices[device._intercom.id]
+        for device in added:
+            self.devices[device._intercom.id] = device
+
+        self.fetched_at = time.time()
+        changed = bool(added or removed or updated)
+        # Снимок перезаписываем только при изменениях или если его еще нет
+        if changed or not self._persisted:
+            await self._store.async_save({
+                "fetched_at": self.fetched_at,
+                "intercoms": [model_to_dict(intercom) for intercom in intercoms],
+            })
+            self._persisted = True
+        if changed:
+            self._reindex()
+            _LOGGER.info("Intercom list changed: +%s -%s ~%s", len(added), len(removed), len(updated))
+            for listener in list(self._listeners):
+                listener(added, removed, updated)
+
+    @callback
+    def async_add_listener(self, listener: CatalogListener) -> CALLBACK_TYPE:
+        """Подписаться на изменения списка домофонов."""
+        self._listeners.append(listener)
+
+        @callback
+        def _remove() -> None:
+            self._listeners.remove(listener)
+
+        return _remove
+
+    @callback
+    def async_track_entities(self, entry: ConfigEntry, async_add_entities: AddEntitiesCallback,
+                             factory: Callable[[DoorPhoneDevice], _EntityT],
+                             entities: Optional[Dict[int, _EntityT]] = None) -> Dict[int, _EntityT]:
+        """
+            Сущность платформы на каждый домофон: добавляет их сейчас и по мере появления домофонов,
+            удаляет из реестра вместе с домофоном, обновляет состояние при изменении домофона.
+            Возвращает словарь id домофона -> сущность (можно передать свой в entities).
+        """
+        entities = {} if entities is None else entities
+
+        @callback
+        def _async_add_devices(devices: List[DoorPhoneDevice]) -> None:
+            new_entities = []
+            for device in devices:
+                entity = factory(device)
+                entities[device._intercom.id] = entity
+                new_entities.append(entity)
+            if new_entities:
+                async_add_entities(new_entities)
+
+        @callback
+        def _async_catalog_changed(added: List[DoorPhoneDevice], removed: List[DoorPhoneDevice],
+                                   updated: List[DoorPhoneDevice]) -> None:
+            """Применяем к сущностям только разницу после сверки списка домофонов."""
+            _async_add_devices(added)
+            entity_registry = er.async_get(self._hass)
+            for device in removed:
+                entity = entities.pop(device._intercom.id, None)
+                if entity is not None and entity.entity_id is not None:
+                    entity_registry.async_remove(entity.entity_id)
+            for device in updated:
+                entity = entities.get(device._intercom.id)
+                if entity is not None and entity.hass is not None:
+                    entity.async_write_ha_state()
+
+        _async_add_devices(list(self.devices.values()))
+        entry.async_on_unload(self.async_add_listener(_async_catalog_changed))
+        return entities
+
+    async def async_remove(self) -> None:
+        """Удалить снимок (при удалении записи)."""
+        await self._store.async_remove()
@@ -0,0 +1,107 @@
+"""Архив видеозаписей звонков: фоновая докачиваемая загрузка на диск."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import AsyncIterator
+
+from aiohttp import ClientTimeout
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (DOMAIN, CONF_LOGGER_NAME, CLIP_MAX_BYTES, CLIP_MAX_CONCURRENT, CLIP_MAX_BANDWIDTH,
+                    CLIP_MAX_ATTEMPTS, CLIP_READ_TIMEOUT, CLIP_PARTIAL_MAX_AGE)
+from .media_cache import DiskLRUCache
+from .api.exceptions import UfanetIntercomAPIError
+from .api.resilience import RetryPolicy
+from .api.ufanet_api import UfanetIntercomAPI
+
+_LOGGER = logging.getLogger(CONF_LOGGER_NAME)
+
+
+class BandwidthLimiter:
+    """Общий для всех загрузок лимит скорости, байт/с: каждый кусок ждет своей очереди в «расписании»."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._next = 0.0
+
+    async def throttle(self, size: int) -> None:
+        now = time.monotonic()
+        start = max(now, self._next)
+        self._next = start + size / self.rate
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class ClipDownloader:
+    """
+        Скачивает ролики звонков (HistoryData.url) в папку с квотой, старые вытесняются первыми.
+        Ролик идет на диск кусками через executor и в памяти целиком не бывает.
+        Оборванная загрузка продолжается с места обрыва (Range), в том числе после перезапуска HA.
+        Одновременно качается не больше max_concurrent роликов (фоновая полоса клиента, открытию
+        двери не мешает), суммарная скорость ограничена, повторная постановка того же uuid игнорируется.
+    """
+
+    def __init__(self, hass: HomeAssistant, directory: str, max_bytes: int = CLIP_MAX_BYTES,
+                 max_concurrent: int = CLIP_MAX_CONCURRENT, bandwidth: float = CLIP_MAX_BANDWIDTH,
+                 attempts: int = CLIP_MAX_ATTEMPTS):
+        self._hass = hass
+        self._cache = DiskLRUCache(hass, directory, max_bytes, suffix=".mp4", partial_max_age=CLIP_PARTIAL_MAX_AGE)
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._bandwidth = BandwidthLimiter(bandwidth)
+        self._retry_policy = RetryPolicy(attempts=attempts, base_delay=5, max_delay=120)
+        # uuid звонка -> задача загрузки
+        self._tasks: dict[str, asyncio.Task] = {}
+        self.downloaded = 0
+        self.failed = 0
+
+    @callback
+    def async_enqueue(self, entry: ConfigEntry, api: UfanetIntercomAPI, uuid: str) -> None:
+        """Поставить ролик звонка в очередь (задача записи: отменяется при выгрузке записи)."""
+        if uuid in self._tasks or uuid in self._cache:
+            return
+        task = entry.async_create_background_task(
+            self._hass, self.async_download(api, uuid), f"{DOMAIN}_clip_{uuid}")
+        self._tasks[uuid] = task
+        task.add_done_callback(lambda _: self._tasks.pop(uuid, None))
+
+    async def async_download(self, api: UfanetIntercomAPI, uuid: str) -> bool:
+        await self._cache.async_load()
+        if uuid in self._cache:
+            return True
+        delays = self._retry_policy.delays()
+        while True:
+            try:
+                async with self._semaphore:
+                    size = await self._cache.async_store_resumable(
+                        uuid, lambda offset: self._stream(api, uuid, offset))
+            except UfanetIntercomAPIError as err:
+                delay = next(delays, None)
+                if delay is None:
+                    _LOGGER.warning("Failed to download clip of call %s: %r", uuid, err)
+                    self.failed += 1
+                    await self._cache.async_discard_partial(uuid)
+                    return False
+                # Пауза перед докачкой - без слота, чтобы не задерживать другие ролики
+                _LOGGER.debug("Clip of call %s interrupted (%r), resuming in %.0fs", uuid, err, delay)
+                await asyncio.sleep(delay)
+                continue
+            _LOGGER.debug("Clip of call %s saved, %s bytes", uuid, size)
+            self.downloaded += 1
+            return True
+
+    async def _stream(self, api: UfanetIntercomAPI, uuid: str, offset: int) -> AsyncIterator[bytes]:
+        # Ссылки подписаны и протухают: берем их перед каждой попыткой (клиент кэширует их по сроку жизни)
+        links = await api.get_call_history_links(uuid)
+        # Общий таймаут не подходит для длинной загрузки с ограничением скорости, следим только за чтением
+        timeout = ClientTimeout(total=None, sock_read=CLIP_READ_TIMEOUT)
+        async for chunk in api.stream_media(links.url, offset=offset, timeout=timeout):
+            await self._bandwidth.throttle(len(chunk))
+            yield chunk
+
+    def as_dict(self) -> dict:
+        return {"queued": len(self._tasks), "downloaded": self.downloaded, "failed": self.failed,
+                "disk_bytes": self._cache.size}
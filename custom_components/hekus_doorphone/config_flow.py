@@ -2,24 +2,22 @@
 from __future__ import annotations
 
 import logging
-from typing import (Any, List)
+from typing import Any
 
 import voluptuous as vol
-import aiohttp
 import asyncio
-from .api.ufanet_api import UfanetIntercomAPI
 from .api.exceptions import (BadRequestUfanetIntercomAPIError)
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers import aiohttp_client
+from homeassistant.helpers import selector
 
-from .device import DoorPhoneDevice, create_devices
-from .api.models import Intercom
-
-from .const import DOMAIN, CONF_USERNAME, CONF_PASSWORD, CONF_DEVICE_ID, CONF_LOGGER_NAME
+from . import async_import_modules
+from .const import (DOMAIN, CONF_USERNAME, CONF_PASSWORD, CONF_DEVICE_ID, CONF_LOGGER_NAME, CONF_TOKEN, CONF_ROUTES,
+                    CONF_ARCHIVE_CLIPS)
+from .services import format_routes, parse_routes
 
 _LOGGER = logging.getLogger(CONF_LOGGER_NAME)
 
@@ -35,8 +33,15 @@ async def validate_credentials(hass: HomeAssistant, data: dict[str, Any]) -> dic
     
     username = data[CONF_USERNAME]
     password = data[CONF_PASSWORD]
-    
-    ufanet_api = UfanetIntercomAPI(contract=username, password=password)
+
+    # Клиент API нужен только при отправке формы, показ формы его не загружает
+    await async_import_modules(hass, "manager")
+    from aiohttp import ClientError
+    from .api.ufanet_api import UfanetIntercomAPI
+    from .manager import async_get_session
+
+    session = await async_get_session(hass)
+    ufanet_api = UfanetIntercomAPI(contract=username, password=password, session=session)
         
     try:
         await ufanet_api._prepare_token()
@@ -48,13 +53,14 @@ async def validate_credentials(hass: HomeAssistant, data: dict[str, Any]) -> dic
             "data": {
                 **data,
                 'name': CONF_DEVICE_ID,
-                'token': '_mock_token_guid'                 
+                # Токен передаем в async_setup_entry, чтобы не логиниться повторно
+                CONF_TOKEN: ufanet_api.export_token()
             }
         }
     except BadRequestUfanetIntercomAPIError as exp:
         msg = exp.args[0]['non_field_errors'][0]
         raise InvalidAuth(msg)
-    except aiohttp.ClientError as err:
+    except ClientError as err:
         raise CannotConnect(f"Cannot connect to Ufanet API: {err}") from err
     except asyncio.TimeoutError:
         raise CannotConnect("Connection timeout") from None
@@ -64,6 +70,11 @@ class UfanetDoorPhoneConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> UfanetDoorPhoneOptionsFlow:
+        return UfanetDoorPhoneOptionsFlow(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -95,6 +106,49 @@ class UfanetDoorPhoneConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+class UfanetDoorPhoneOptionsFlow(config_entries.OptionsFlow):
+    """Настройки записи: именованные маршруты для сервиса open_doors и архив видеозаписей звонков."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        self._entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        errors: dict[str, str] = {}
+        routes_text = format_routes(self._entry.options.get(CONF_ROUTES, {}))
+
+        if user_input is not None:
+            routes_text = user_input.get(CONF_ROUTES, "")
+            try:
+                routes = parse_routes(routes_text)
+            except ValueError:
+                errors[CONF_ROUTES] = "invalid_routes"
+            else:
+                return self.async_create_entry(title="", data={
+                    **self._entry.options,
+                    CONF_ROUTES: routes,
+                    CONF_ARCHIVE_CLIPS: user_input.get(CONF_ARCHIVE_CLIPS, False),
+                })
+
+        # Подсказка: какие домофоны есть у договора
+        catalog = self.hass.data.get(DOMAIN, {}).get(self._entry.entry_id, {}).get("catalog")
+        intercoms = "-"
+        if catalog is not None:
+            intercoms = "\n".join(f"{intercom_id}: {device.name}" for intercom_id, device in catalog.devices.items())
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                vol.Optional(CONF_ROUTES, default=routes_text):
+                    selector.TextSelector(selector.TextSelectorConfig(multiline=True)),
+                vol.Optional(CONF_ARCHIVE_CLIPS, default=self._entry.options.get(CONF_ARCHIVE_CLIPS, False)):
+                    selector.BooleanSelector(),
+            }),
+            errors=errors,
+            description_placeholders={"intercoms": intercoms},
+        )
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect to Ufanet API."""
 
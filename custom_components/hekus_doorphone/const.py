@@ -1,9 +1,64 @@
 """Constants for Ufanet Door Phone integration."""
 
 DOMAIN = "hekus_doorphone"
+# Ключ общего менеджера (manager.py) в hass.data[DOMAIN]
+DATA_MANAGER = "manager"
 CONF_USERNAME = "username"
 CONF_PASSWORD = "password"
 CONF_DEVICE_ID = "ufanet_doorphone"
 CONF_LOGGER_NAME = "HekusDoorPhone"
+CONF_TOKEN = "token"
+# Именованные маршруты для группового открытия (в options записи): имя -> id домофонов
+CONF_ROUTES = "routes"
 
-DEFAULT_SCAN_INTERVAL = 300  # 5 минут
\ No newline at end of file
+DEFAULT_SCAN_INTERVAL = 300  # 5 минут
+
+# Адаптивный опрос истории звонков
+POLL_INTERVAL_MIN = 15
+POLL_INTERVAL_MAX = DEFAULT_SCAN_INTERVAL
+POLL_INTERVAL_ERROR_MAX = 900
+POLL_BACKOFF_FACTOR = 1.5
+
+# Общие лимиты на все договоры (фоновые запросы; открытие двери их не ждет)
+GLOBAL_MAX_CONCURRENT_REQUESTS = 5
+# Соединения пула, которые фоновые запросы и токены не занимают никогда (только открытие двери)
+UNLOCK_RESERVED_CONNECTIONS = 2
+GLOBAL_RATE_LIMIT = 5
+GLOBAL_RATE_BURST = 20
+# Первые опросы договоров разносим по этому окну, секунды
+POLL_STAGGER_WINDOW = 60
+
+# Быстрое открытие двери: отдельный короткий таймаут и дублирующий запрос при задержке
+UNLOCK_TIMEOUT = 5
+UNLOCK_HEDGE_AFTER = 1.5
+# Защита от повторного открытия той же двери, с
+UNLOCK_COOLDOWN = 8
+# После открытия или звонка держим соединение теплым (интервал меньше keep-alive коннектора)
+WARM_WINDOW = 600
+WARM_KEEPALIVE_INTERVAL = 45
+
+# Кэш превью звонков на диске (в папке конфигурации HA)
+PREVIEW_CACHE_DIR = f"{DOMAIN}/previews"
+PREVIEW_CACHE_MAX_BYTES = 20 * 1024 * 1024
+
+# Локальный архив звонков (SQLite в папке конфигурации HA)
+ARCHIVE_DB = f"{DOMAIN}/calls.db"
+ARCHIVE_MAX_AGE_DAYS = 365
+ARCHIVE_MAX_CALLS = 100_000
+ARCHIVE_QUERY_LIMIT = 100
+ARCHIVE_QUERY_MAX_LIMIT = 1000
+
+# Архив видеозаписей звонков (включается в настройках записи)
+CONF_ARCHIVE_CLIPS = "archive_clips"
+CLIP_DIR = f"{DOMAIN}/clips"
+CLIP_MAX_BYTES = 2 * 1024 * 1024 * 1024
+CLIP_MAX_CONCURRENT = 2
+CLIP_MAX_BANDWIDTH = 2 * 1024 * 1024  # байт/с на все загрузки
+CLIP_MAX_ATTEMPTS = 5
+CLIP_READ_TIMEOUT = 60
+CLIP_PARTIAL_MAX_AGE = 24 * 3600  # недокачанный ролик старше суток не докачиваем
+
+EVENT_CALL = f"{DOMAIN}_call"
+# Сигнал dispatcher о звонке в конкретный домофон: format(entry_id, intercom_id),
+# аргументы (звонок, новый ли он; False - последний звонок из истории при старте)
+SIGNAL_CALL = f"{DOMAIN}_call_{{}}_{{}}"
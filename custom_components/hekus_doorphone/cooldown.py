@@ -0,0 +1,91 @@
+"""Общий планировщик периодов охлаждения замков."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+from typing import Callable, Hashable
+
+from homeassistant.core import callback
+
+
+class CooldownScheduler:
+    """
+        Один таймер event loop на все замки вместо call_later на каждое открытие.
+        У каждого ключа (замка) не больше одного дедлайна: повторный schedule переносит его,
+        cancel отменяет. Дедлайны в монотонном времени loop.time() лежат в куче,
+        таймер loop взведен только на ближайший из них.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        # ключ -> (дедлайн, колбэк); в куче могут оставаться устаревшие записи, они пропускаются
+        self._timers: dict[Hashable, tuple[float, Callable[[], None]]] = {}
+        self._heap: list[tuple[float, int, Hashable]] = []
+        self._sequence = 0
+        self._handle: asyncio.TimerHandle | None = None
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    @callback
+    def schedule(self, key: Hashable, delay: float, action: Callable[[], None]) -> None:
+        """Вызвать action через delay секунд, заменив прежний таймер ключа."""
+        deadline = self._loop.time() + delay
+        self._timers[key] = (deadline, action)
+        self._sequence += 1
+        heapq.heappush(self._heap, (deadline, self._sequence, key))
+        self._arm()
+
+    @callback
+    def cancel(self, key: Hashable) -> None:
+        self._timers.pop(key, None)
+        if not self._timers:
+            self._disarm()
+
+    @callback
+    def cancel_all(self) -> None:
+        self._timers.clear()
+        self._heap.clear()
+        self._disarm()
+
+    def remaining(self, key: Hashable) -> float:
+        """Сколько секунд осталось до конца охлаждения (0, если таймера нет)."""
+        timer = self._timers.get(key)
+        return max(timer[0] - self._loop.time(), 0.0) if timer is not None else 0.0
+
+    def active(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    def _arm(self) -> None:
+        # Выбрасываем с вершины кучи отмененные и перенесенные записи
+        heap = self._heap
+        while heap and self._timers.get(heap[0][2], (None,))[0] != heap[0][0]:
+            heapq.heappop(heap)
+        if not heap:
+            self._disarm()
+            return
+        deadline = heap[0][0]
+        if self._handle is not None and self._handle.when() <= deadline:
+            return
+        self._disarm()
+        self._handle = self._loop.call_at(deadline, self._fire)
+
+    def _disarm(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    @callback
+    def _fire(self) -> None:
+        self._handle = None
+        now = self._loop.time()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, key = heapq.heappop(self._heap)
+            timer = self._timers.get(key)
+            if timer is not None and timer[0] == deadline:
+                del self._timers[key]
+                due.append(timer[1])
+        for action in due:
+            action()
+        self._arm()
@@ -0,0 +1,119 @@
+"""Координатор истории звонков с адаптивным интервалом опроса."""
+from __future__ import annotations
+
+import logging
+import sqlite3
+from datetime import timedelta
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import DOMAIN, CONF_LOGGER_NAME, EVENT_CALL, SIGNAL_CALL
+from .api.ufanet_api import UfanetIntercomAPI
+from .api.models import HistoryResult
+from .api.exceptions import (UfanetIntercomAPIError, UnauthorizedUfanetIntercomAPIError,
+                             ServerErrorUfanetIntercomAPIError)
+from .archive import CallArchive
+from .catalog import IntercomCatalog
+from .history_sync import CallHistorySync
+from .scheduler import AdaptivePollInterval
+from .warmup import UnlockWarmer
+
+_LOGGER = logging.getLogger(CONF_LOGGER_NAME)
+
+
+class DoorPhoneCoordinator(DataUpdateCoordinator[list[HistoryResult]]):
+    """
+        Опрашивает историю звонков, сообщает о новых звонках событием EVENT_CALL
+        и сигналом SIGNAL_CALL только сущностям домофона, в который звонили,
+        и подстраивает интервал опроса под активность.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, api: UfanetIntercomAPI,
+                 history_sync: CallHistorySync, warmer: UnlockWarmer, catalog: IntercomCatalog,
+                 archive: CallArchive | None = None):
+        self.scheduler = AdaptivePollInterval()
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=timedelta(seconds=self.scheduler.current),
+        )
+        self._entry = entry
+        self._ufanet_api = api
+        self.history_sync = history_sync
+        self._warmer = warmer
+        self._catalog = catalog
+        self._archive = archive
+        self._archive_primed = False
+        self._routed_initial = False
+
+    @property
+    def poll_interval(self) -> float:
+        """Текущий интервал опроса, секунды."""
+        return self.scheduler.current
+
+    def _set_interval(self, seconds: float) -> None:
+        self.update_interval = timedelta(seconds=seconds)
+
+    @callback
+    def async_note_activity(self) -> None:
+        """Открыли дверь: опрашиваем чаще, начиная прямо сейчас."""
+        self._set_interval(self.scheduler.activity())
+        self.hass.async_create_task(self.async_request_refresh())
+
+    async def _async_update_data(self) -> list[HistoryResult]:
+        """Догружаем новые звонки и сообщаем о каждом событием."""
+        try:
+            new_calls = await self.history_sync.async_sync()
+        except UnauthorizedUfanetIntercomAPIError as err:
+            raise ConfigEntryAuthFailed from err
+        except UfanetIntercomAPIError as err:
+            retry_after = err.retry_after if isinstance(err, ServerErrorUfanetIntercomAPIError) else None
+            self._set_interval(self.scheduler.error(retry_after))
+            raise UpdateFailed(f"Error communicating with API: {err}") from err
+
+        entry_id = self._entry.entry_id
+        for call in new_calls:
+            device = self._catalog.device_for_call(call)
+            intercom_id = device._intercom.id if device is not None else None
+            self.hass.bus.async_fire(EVENT_CALL, {
+                "entry_id": entry_id,
+                "intercom_id": intercom_id,
+                "uuid": call.uuid,
+                "called_at": call.called_at.isoformat(),
+                "address": call.address,
+                "porch": call.porch,
+                "flat": call.flat,
+                "house_id": call.house_id,
+                "camera_number": call.camera_number,
+                "skud_mac": call.skud_mac,
+            })
+            if intercom_id is not None:
+                async_dispatcher_send(self.hass, SIGNAL_CALL.format(entry_id, intercom_id), call, True)
+        if not self._routed_initial:
+            # Первая синхронизация новых звонков не дает: раздаем сущностям последний известный звонок
+            for intercom_id, call in self._catalog.latest_calls(self.history_sync.recent).items():
+                async_dispatcher_send(self.hass, SIGNAL_CALL.format(entry_id, intercom_id), call, False)
+            self._routed_initial = True
+        if self._archive is not None:
+            # Первая синхронизация новых звонков не дает, но уже загрузила последнюю страницу истории
+            calls = new_calls if self._archive_primed else list(self.history_sync.recent)
+            try:
+                await self._archive.async_add(entry_id, calls)
+                self._archive_primed = True
+            except (sqlite3.Error, OSError) as err:
+                # Архив вспомогательный: опрос истории из-за него не ломаем (ни ошибки базы, ни диска)
+                _LOGGER.warning("Failed to archive %s calls: %s", len(calls), err)
+        if new_calls:
+            _LOGGER.debug("New calls: %s", len(new_calls))
+            # Звонят в домофон - скоро, скорее всего, будут открывать
+            self._entry.async_create_background_task(
+                self.hass, self._warmer.async_warm_up(), f"{DOMAIN}_warm_up_{self._entry.entry_id}")
+            self._set_interval(self.scheduler.activity())
+        else:
+            self._set_interval(self.scheduler.idle())
+        return list(self.history_sync.recent)
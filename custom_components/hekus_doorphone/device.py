@@ -2,6 +2,11 @@
 
 from dataclasses import dataclass
 from typing import List, Dict, Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+
+from .const import DOMAIN
 from .api.models import Intercom
 
 @dataclass
@@ -13,6 +18,11 @@ class DoorPhoneDevice:
         self.device_id = f'ufanet_doorphone_{intercom.id}'
         self.name = f"{intercom.string_view} ({intercom.role.name})"
         self.sensor_value = 0
+
+    def update(self, intercom: Intercom):
+        """Обновить данные домофона после сверки с облаком."""
+        self._intercom = intercom
+        self.name = f"{intercom.string_view} ({intercom.role.name})"
     
   
     def increment_sensor(self):
@@ -63,4 +73,15 @@ def devices_to_dict(devices: List[DoorPhoneDevice]) -> List[Dict[str, Any]]:
 
 def devices_from_dict(devices_data: List[Dict[str, Any]]) -> List[DoorPhoneDevice]:
     """Create list of devices from list of dictionaries."""
-    return [DoorPhoneDevice.from_dict(data) for data in devices_data]
\ No newline at end of file
+    return [DoorPhoneDevice.from_dict(data) for data in devices_data]
+
+
+def account_device_info(entry: ConfigEntry) -> DeviceInfo:
+    """Устройство договора (аккаунта), к которому привязаны служебные сущности."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, entry.entry_id)},
+        name=entry.title,
+        manufacturer="Ufanet",
+        model="Account",
+        entry_type=DeviceEntryType.SERVICE,
+    )
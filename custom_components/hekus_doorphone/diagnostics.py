@@ -0,0 +1,29 @@
+"""Diagnostics support for Hekus DoorPhone."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_USERNAME, CONF_PASSWORD, CONF_TOKEN, DATA_MANAGER
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD, CONF_TOKEN}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    api = data["api"]
+    manager = hass.data[DOMAIN][DATA_MANAGER]
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "token_valid": api.has_valid_token,
+        "intercoms": len(data["catalog"].devices),
+        "poll_interval": data["coordinator"].poll_interval,
+        "circuit_breaker": api.circuit_breaker.as_dict(),
+        "metrics": api.metrics.as_dict(),
+        "manager": manager.as_dict(),
+        "archive": await manager.archive.async_stats(),
+    }
@@ -0,0 +1,66 @@
+"""Event for Hekus DoorPhone integration: звонки в домофон."""
+from __future__ import annotations
+
+from homeassistant.components.event import EventDeviceClass, EventEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN, SIGNAL_CALL
+from .device import DoorPhoneDevice
+from .catalog import IntercomCatalog
+from .api.models import HistoryResult
+
+EVENT_TYPE_CALL = "call"
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Добавляем событие звонка для каждого домофона"""
+
+    catalog: IntercomCatalog = hass.data[DOMAIN][entry.entry_id]['catalog']
+    catalog.async_track_entities(entry, async_add_entities, lambda device: DoorPhoneCallEvent(entry, device))
+
+
+class DoorPhoneCallEvent(EventEntity):
+    """Звонок в домофон. Срабатывает только по сигналу о звонке именно в этот домофон."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _attr_device_class = EventDeviceClass.DOORBELL
+    _attr_event_types = [EVENT_TYPE_CALL]
+
+    def __init__(self, entry: ConfigEntry, doorphone: DoorPhoneDevice):
+        self.intercom_id = doorphone._intercom.id
+        self._entry_id = entry.entry_id
+        self._device = doorphone
+
+        self._attr_unique_id = f"intercom_{self.intercom_id}_call"
+        self._attr_name = "Call"
+        self._attr_icon = "mdi:doorbell"
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Устройство домофона, к которому привязано событие"""
+        return DeviceInfo(identifiers={(DOMAIN, self._device.device_id)})
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(async_dispatcher_connect(
+            self.hass, SIGNAL_CALL.format(self._entry_id, self.intercom_id), self._async_handle_call))
+
+    @callback
+    def _async_handle_call(self, call: HistoryResult, new: bool) -> None:
+        if not new:
+            return
+        self._trigger_event(EVENT_TYPE_CALL, {
+            "call_uuid": call.uuid,
+            "called_at": call.called_at.isoformat(),
+            "porch": call.porch,
+            "flat": call.flat,
+        })
+        self.async_write_ha_state()
@@ -0,0 +1,241 @@
+"""Локальный сервер вместо dom.ufanet.ru: отладка и бенчмарки без облака и без реального договора.
+
+Запуск из папки интеграции (как test.py):
+
+    python fake_server.py --port 8080 --calls 5000 --latency 0.05 --token-lifetime 120
+
+и клиент с base_url='http://127.0.0.1:8080/', договор/пароль 1/1.
+Из кода (bench.py) сервер поднимается на свободном порту:
+
+    server = FakeUfanetServer(calls=1000, latency=0.02)
+    base_url = await server.start()
+    server.inject('open_intercom', 503, FakeUfanetServer.HANG)   # следующие два открытия: 503, затем зависание
+    ...
+    await server.stop()
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from collections import Counter, defaultdict, deque
+from datetime import datetime, timedelta, timezone
+from itertools import count
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from aiohttp import web
+
+# Реальный ответ api/v0/skud/shared/ (см. закомментированный get_mock_intercoms в __init__.py)
+SAMPLE_INTERCOMS = [{'id': 109757, 'contract': None, 'role': {'id': 8, 'name': 'Домофон-калитка'}, 'camera': None, 'cctv_number': '1738053250GTF70', 'string_view': 'г. Уфа, Заки Валиди, 71', 'timeout': 10, 'disable_button': False, 'no_sound': True, 'open_in_talk': 'http', 'open_type': 'http', 'dtmf_code': '#0', 'inactivity_reason': None, 'house': 458263, 'frsi': True, 'is_fav': False, 'model': 39, 'custom_name': None, 'is_blocked': False, 'supports_key_recording': True, 'ble_support': True, 'is_support_sip_monitor': False, 'relays': [], 'private_status': 1, 'scope': 'owner'}, {'id': 103616, 'contract': None, 'role': {'id': 8, 'name': 'Домофон-калитка'}, 'camera': None, 'cctv_number': '1737985955HSN76', 'string_view': 'г. Уфа, Заки Валиди, 73', 'timeout': 10, 'disable_button': False, 'no_sound': True, 'open_in_talk': 'http', 'open_type': 'http', 'dtmf_code': '#0', 'inactivity_reason': None, 'house': 31465, 'frsi': True, 'is_fav': False, 'model': 39, 'custom_name': None, 'is_blocked': False, 'supports_key_recording': True, 'ble_support': True, 'is_support_sip_monitor': False, 'relays': [], 'private_status': 1, 'scope': 'owner'}, {'id': 103413, 'contract': 664192, 'role': {'id': 2, 'name': 'Домофон'}, 'camera': None, 'cctv_number': '1737976793GSM0', 'string_view': 'г. Уфа, Заки Валиди, 73, п.1', 'timeout': 10, 'disable_button': False, 'no_sound': True, 'open_in_talk': 'http', 'open_type': 'http', 'dtmf_code': '#0', 'inactivity_reason': None, 'house': 31465, 'frsi': True, 'is_fav': False, 'model': 39, 'custom_name': None, 'is_blocked': False, 'supports_key_recording': True, 'ble_support': True, 'is_support_sip_monitor': False, 'relays': [], 'private_status': 1, 'scope': 'owner'}]
+
+# Самый свежий звонок синтетической истории, остальные - раз в минуту раньше
+HISTORY_START = datetime(2026, 1, 1, 12, 0, tzinfo=timezone(timedelta(hours=5)))
+
+
+def make_call(i: int, intercoms: List[Dict[str, Any]] = SAMPLE_INTERCOMS) -> dict:
+    """i-й звонок истории (0 - самый свежий), камеры по очереди с домофонов."""
+    intercom = intercoms[i % len(intercoms)]
+    return {'uuid': f'{i:032x}', 'house_id': intercom['house'], 'address': intercom['string_view'],
+            'porch': '1', 'flat': '1', 'called_at': (HISTORY_START - timedelta(minutes=i)).isoformat(),
+            'camera_number': intercom['cctv_number'], 'skud_mac': f'mac{intercom["id"]}',
+            'timezone': 'Asia/Yekaterinburg'}
+
+
+def make_history_page(count: int, size: int, start: int = 0,
+                      intercoms: List[Dict[str, Any]] = SAMPLE_INTERCOMS) -> dict:
+    stop = min(start + size, count)
+    return {'count': count, 'next': 'next' if stop < count else None, 'previous': None,
+            'results': [make_call(i, intercoms) for i in range(start, stop)]}
+
+
+class FakeUfanetServer:
+    """
+        Реализует auth_by_contract, api-token-verify, skud/shared, skud/shared/{id}/open,
+        call-history, cctv/history и отдачу медиа (с Range). Умеет:
+        - задержку ответа (latency + случайный jitter);
+        - срок жизни токена: просроченный токен получает 401;
+        - ошибки: случайные 503 с долей error_rate и очередь ошибок на endpoint через inject();
+        - ETag/304 для списка домофонов и истории.
+        Имена endpoint'ов совпадают с именами в метриках клиента (api/metrics.py).
+    """
+
+    HANG = 0  # в inject(): ответ зависает, клиент получает таймаут
+    HANG_TIME = 3600
+
+    def __init__(self, contract: str = '1', password: str = '1', calls: int = 0,
+                 intercoms: List[Dict[str, Any]] = None, latency: float = 0.0, jitter: float = 0.0,
+                 token_lifetime: float = 3600, error_rate: float = 0.0, media_size: int = 64 * 1024,
+                 seed: Optional[int] = None):
+        self.contract = contract
+        self.password = password
+        self.calls = calls
+        self.intercoms = intercoms if intercoms is not None else SAMPLE_INTERCOMS
+        self.latency = latency
+        self.jitter = jitter
+        self.token_lifetime = token_lifetime
+        self.error_rate = error_rate
+        self.media_size = media_size
+        # Запросы и ответы по endpoint'ам: stats['open_intercom'], statuses['open_intercom'][503]
+        self.stats: Counter[str] = Counter()
+        self.statuses: Dict[str, Counter[int]] = defaultdict(Counter)
+        self._random = random.Random(seed)
+        self._faults: Dict[str, Deque[int]] = defaultdict(deque)
+        # значение из заголовка Authorization -> когда истекает (time.time())
+        self._tokens: Dict[str, float] = {}
+        self._token_ids = count(1)
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url: Optional[str] = None
+
+    def inject(self, endpoint: str, *statuses: int) -> None:
+        """Следующие запросы к endpoint получат эти статусы по очереди (HANG - зависание)."""
+        self._faults[endpoint].extend(statuses)
+
+    def expire_tokens(self) -> None:
+        """Сделать все выданные токены просроченными (как после смены пароля)."""
+        self._tokens.clear()
+
+    def _issue_token(self) -> dict:
+        token_id = next(self._token_ids)
+        exp = time.time() + self.token_lifetime
+        token = {'access': f'access-{token_id}', 'refresh': f'refresh-{token_id}', 'exp': int(exp)}
+        self._tokens[token['access']] = self._tokens[token['refresh']] = exp
+        return token
+
+    def _authorized(self, request: web.Request) -> bool:
+        scheme, _, value = request.headers.get('Authorization', '').partition(' ')
+        expires_at = self._tokens.get(value)
+        return scheme == 'JWT' and expires_at is not None and expires_at > time.time()
+
+    @web.middleware
+    async def _middleware(self, request: web.Request,
+                          handler: Callable[[web.Request], Awaitable[web.StreamResponse]]) -> web.StreamResponse:
+        endpoint = request.match_info.route.name
+        self.stats[endpoint] += 1
+        response = await self._respond(request, handler, endpoint)
+        self.statuses[endpoint][response.status] += 1
+        return response
+
+    async def _respond(self, request: web.Request, handler, endpoint: str) -> web.StreamResponse:
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self._random.uniform(0, self.jitter))
+        faults = self._faults.get(endpoint)
+        status = faults.popleft() if faults else None
+        if status is None and self.error_rate and self._random.random() < self.error_rate:
+            status = 503
+        if status == self.HANG:
+            await asyncio.sleep(self.HANG_TIME)
+        if status is not None:
+            body = {'non_field_errors': ['Injected error']} if status == 400 else {'detail': 'Injected error'}
+            return web.json_response(body, status=status)
+        if endpoint not in ('auth', 'token_verify', 'media') and not self._authorized(request):
+            return web.json_response({'detail': 'Token expired'}, status=401)
+        return await handler(request)
+
+    @staticmethod
+    def _cacheable(request: web.Request, payload: Any) -> web.Response:
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(body=body, content_type='application/json', headers={'ETag': etag})
+
+    async def _auth(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        if data.get('contract') != self.contract or data.get('password') != self.password:
+            return web.json_response({'non_field_errors': ['Неверный номер договора или пароль']}, status=400)
+        return web.json_response({'token': self._issue_token()})
+
+    async def _token_verify(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        if self._tokens.get(data.get('token'), 0) <= time.time():
+            return web.json_response({'detail': 'Token is invalid or expired'}, status=401)
+        return web.json_response({'token': data['token']})
+
+    async def _get_intercoms(self, request: web.Request) -> web.Response:
+        return self._cacheable(request, self.intercoms)
+
+    async def _open_intercom(self, request: web.Request) -> web.Response:
+        intercom_id = int(request.match_info['intercom_id'])
+        if not any(intercom['id'] == intercom_id for intercom in self.intercoms):
+            return web.json_response({'detail': 'Not found'}, status=404)
+        return web.json_response({'result': True})
+
+    async def _get_call_history(self, request: web.Request) -> web.Response:
+        page = int(request.query.get('page', 1))
+        page_size = int(request.query.get('page_size', 25))
+        return self._cacheable(request, make_history_page(self.calls, page_size, (page - 1) * page_size,
+                                                          self.intercoms))
+
+    async def _get_call_history_links(self, request: web.Request) -> web.Response:
+        uuid = (await request.json())['uuid']
+        expires = int(time.time()) + 600
+        media = f'{self.base_url or "/"}media/{uuid}'
+        return web.json_response({'url': f'{media}.mp4?expires={expires}',
+                                  'preview': f'{media}.jpg?expires={expires}'})
+
+    async def _media(self, request: web.Request) -> web.Response:
+        # Содержимое детерминировано по имени файла, чтобы докачку можно было проверить
+        seed = hashlib.sha1(request.match_info['name'].encode()).digest()
+        content = (seed * (self.media_size // len(seed) + 1))[:self.media_size]
+        start = 0
+        if request.http_range.start is not None:
+            start = request.http_range.start
+            if start >= len(content):
+                return web.Response(status=416, headers={'Content-Range': f'bytes */{len(content)}'})
+            return web.Response(status=206, body=content[start:], headers={
+                'Content-Range': f'bytes {start}-{len(content) - 1}/{len(content)}', 'Accept-Ranges': 'bytes'})
+        return web.Response(body=content, headers={'Accept-Ranges': 'bytes'})
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post('/api/v1/auth/auth_by_contract/', self._auth, name='auth')
+        app.router.add_post('/api-token-verify/', self._token_verify, name='token_verify')
+        app.router.add_get('/api/v0/skud/shared/', self._get_intercoms, name='get_intercoms')
+        app.router.add_get('/api/v0/skud/shared/{intercom_id}/open/', self._open_intercom, name='open_intercom')
+        app.router.add_get('/api/v1/skuds/call-history/', self._get_call_history, name='get_call_history')
+        app.router.add_post('/api/v1/cctv/history/', self._get_call_history_links, name='get_call_history_links')
+        app.router.add_get('/media/{name}', self._media, name='media')
+        return app
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0, ssl_context=None) -> str:
+        """Запустить сервер (port=0 - свободный порт) и вернуть base_url для клиента."""
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port, ssl_context=ssl_context)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"{'https' if ssl_context else 'http'}://{host}:{port}/"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def main(args: argparse.Namespace):
+    server = FakeUfanetServer(calls=args.calls, latency=args.latency, jitter=args.jitter,
+                              token_lifetime=args.token_lifetime, error_rate=args.error_rate)
+    base_url = await server.start(args.host, args.port)
+    print(f'Fake Ufanet API on {base_url} (contract {server.contract}, password {server.password})')
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--calls', type=int, default=1000, help='размер синтетической истории звонков')
+    parser.add_argument('--latency', type=float, default=0.0, help='задержка каждого ответа, с')
+    parser.add_argument('--jitter', type=float, default=0.0, help='случайная добавка к задержке, с')
+    parser.add_argument('--token-lifetime', type=float, default=3600, help='срок жизни токена, с')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='доля случайных ответов 503')
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,90 @@
+"""Инкрементальная синхронизация истории звонков."""
+from __future__ import annotations
+
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Optional, Tuple
+
+from .const import CONF_LOGGER_NAME
+from .api.ufanet_api import UfanetIntercomAPI
+from .api.models import HistoryResult
+
+_LOGGER = logging.getLogger(CONF_LOGGER_NAME)
+
+# Маленькая первая страница: в штатном режиме новых звонков 0-2
+PROBE_PAGE_SIZE = 5
+PAGE_SIZE = 25
+MAX_PAGES = 8
+RECENT_CALLS = 50
+
+
+class CallHistorySync:
+    """
+        Помнит последний увиденный звонок (called_at, uuid) и при каждом опросе
+        догружает страницы истории только до него.
+    """
+
+    def __init__(self, api: UfanetIntercomAPI, probe_page_size: int = PROBE_PAGE_SIZE,
+                 page_size: int = PAGE_SIZE, max_pages: int = MAX_PAGES, recent_size: int = RECENT_CALLS):
+        self._api = api
+        self._probe_page_size = probe_page_size
+        self._page_size = page_size
+        self._max_pages = max_pages
+        self.watermark: Optional[Tuple[datetime, str]] = None
+        self._initialized = False
+        # Последние звонки, новые в начале
+        self.recent: Deque[HistoryResult] = deque(maxlen=recent_size)
+
+    def _is_seen(self, call: HistoryResult) -> bool:
+        if self.watermark is None:
+            return False
+        called_at, uuid = self.watermark
+        return call.uuid == uuid or call.called_at < called_at
+
+    async def async_sync(self) -> List[HistoryResult]:
+        """Загрузить новые звонки. Возвращает их от старых к новым.
+
+        Первая синхронизация только запоминает водяной знак и ничего не возвращает,
+        чтобы не выдавать старую историю за новые звонки.
+        """
+        if not self._initialized:
+            history = await self._api.get_call_history(page=1, page_size=self._page_size)
+            self._remember(list(reversed(history.results)))
+            self._initialized = True
+            return []
+
+        new_calls: List[HistoryResult] = []
+        seen_uuids = set()
+        history = await self._api.get_call_history(page=1, page_size=self._probe_page_size)
+        reached = self._collect(history.results, new_calls, seen_uuids)
+
+        # Проба не дошла до водяного знака: листаем полными страницами
+        page = 1
+        while not reached and history.next and page <= self._max_pages:
+            history = await self._api.get_call_history(page=page, page_size=self._page_size)
+            reached = self._collect(history.results, new_calls, seen_uuids)
+            page += 1
+        if not reached:
+            _LOGGER.warning("Call history watermark not reached after %s pages, some calls may be skipped", page)
+
+        new_calls.reverse()
+        self._remember(new_calls)
+        return new_calls
+
+    def _collect(self, results: List[HistoryResult], new_calls: List[HistoryResult], seen_uuids: set) -> bool:
+        for call in results:
+            if self._is_seen(call):
+                return True
+            if call.uuid not in seen_uuids:
+                seen_uuids.add(call.uuid)
+                new_calls.append(call)
+        return False
+
+    def _remember(self, calls: List[HistoryResult]) -> None:
+        """Добавить звонки (от старых к новым) и сдвинуть водяной знак."""
+        for call in calls:
+            self.recent.appendleft(call)
+        if calls:
+            newest = calls[-1]
+            self.watermark = (newest.called_at, newest.uuid)
@@ -0,0 +1,100 @@
+"""Image for Hekus DoorPhone integration: превью последнего звонка в домофон."""
+from __future__ import annotations
+
+from datetime import datetime
+
+from homeassistant.components.image import ImageEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN, PREVIEW_CACHE_DIR, PREVIEW_CACHE_MAX_BYTES, SIGNAL_CALL
+from .device import DoorPhoneDevice
+from .catalog import IntercomCatalog
+from .media_cache import DiskLRUCache
+from .api.ufanet_api import UfanetIntercomAPI
+from .api.models import HistoryResult
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Добавляем превью последнего звонка для каждого домофона"""
+
+    data = hass.data[DOMAIN][entry.entry_id]
+    catalog: IntercomCatalog = data['catalog']
+    cache = DiskLRUCache(hass, hass.config.path(PREVIEW_CACHE_DIR, entry.entry_id), PREVIEW_CACHE_MAX_BYTES,
+                         suffix=".jpg")
+    await cache.async_load()
+
+    def _create(device: DoorPhoneDevice) -> DoorPhoneCallImage:
+        call = catalog.latest_call(device, data['coordinator'].data or ())
+        return DoorPhoneCallImage(hass, entry, device, data['api'], cache, call)
+
+    catalog.async_track_entities(entry, async_add_entities, _create)
+
+
+class DoorPhoneCallImage(ImageEntity):
+    """
+        Превью последнего звонка в домофон.
+        Картинка скачивается один раз потоком и дальше отдается с диска,
+        сколько бы вкладок браузера ее ни запрашивали.
+        Обновляется по сигналу о звонке именно в этот домофон, а не на каждый опрос истории.
+    """
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _attr_content_type = "image/jpeg"
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, doorphone: DoorPhoneDevice,
+                 api: UfanetIntercomAPI, cache: DiskLRUCache, call: HistoryResult | None):
+        super().__init__(hass)
+        self.intercom_id = doorphone._intercom.id
+        self._entry_id = entry.entry_id
+        self._device = doorphone
+        self._ufanet_api = api
+        self._cache = cache
+        self._call = call
+
+        self._attr_unique_id = f"intercom_{self.intercom_id}_last_call_image"
+        self._attr_name = "Last Call"
+        self._attr_icon = "mdi:doorbell-video"
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Устройство домофона, к которому привязано превью"""
+        return DeviceInfo(identifiers={(DOMAIN, self._device.device_id)})
+
+    @property
+    def image_last_updated(self) -> datetime | None:
+        return self._call.called_at if self._call is not None else None
+
+    @property
+    def extra_state_attributes(self) -> dict | None:
+        if self._call is None:
+            return None
+        return {"call_uuid": self._call.uuid}
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(async_dispatcher_connect(
+            self.hass, SIGNAL_CALL.format(self._entry_id, self.intercom_id), self._async_handle_call))
+
+    @callback
+    def _async_handle_call(self, call: HistoryResult, new: bool) -> None:
+        self._call = call
+        self.async_write_ha_state()
+
+    async def async_image(self) -> bytes | None:
+        """Картинка с диска; из облака - только если этого звонка еще нет в кэше."""
+        if self._call is None:
+            return None
+        uuid = self._call.uuid
+        cached = await self._cache.async_get(uuid)
+        if cached is not None:
+            return cached
+        links = await self._ufanet_api.get_call_history_links(uuid)
+        return await self._cache.async_get_or_fetch(uuid, self._ufanet_api.stream_media(links.preview))
@@ -1,14 +1,17 @@
 """Lock for Hekus DoorPhone integration."""
 from homeassistant.components.lock import LockEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.device_registry import DeviceInfo
 
-from datetime import datetime, timedelta
-
-from .const import DOMAIN
+from .const import DOMAIN, DATA_MANAGER, UNLOCK_TIMEOUT, UNLOCK_HEDGE_AFTER, UNLOCK_COOLDOWN
+from .cooldown import CooldownScheduler
 from .device import DoorPhoneDevice
+from .catalog import IntercomCatalog
+from .warmup import UnlockWarmer
+from .coordinator import DoorPhoneCoordinator
 from .api.ufanet_api import UfanetIntercomAPI
 
 async def async_setup_entry(
@@ -18,26 +21,37 @@ async def async_setup_entry(
 ) -> None:
     """Добавляем каждый домофон в виде замка"""
     
-    devices = hass.data[DOMAIN][entry.entry_id]['devices']
+    catalog: IntercomCatalog = hass.data[DOMAIN][entry.entry_id]['catalog']
     api = hass.data[DOMAIN][entry.entry_id]['api']
-    if devices is not None:
-        entities = []
-        for device in devices:
-            entities.append(DoorPhoneLock(device, api))
-
-        async_add_entities(entities)
+    warmer = hass.data[DOMAIN][entry.entry_id]['warmer']
+    coordinator = hass.data[DOMAIN][entry.entry_id]['coordinator']
+    cooldowns = hass.data[DOMAIN][DATA_MANAGER].cooldowns
+    # Замки по id домофона, нужны и сервису группового открытия (services.py)
+    catalog.async_track_entities(
+        entry, async_add_entities,
+        lambda device: DoorPhoneLock(device, api, warmer, coordinator, cooldowns),
+        hass.data[DOMAIN][entry.entry_id].setdefault('locks', {}),
+    )
 
 class DoorPhoneLock(LockEntity):
     """
         Замок домофона.
-        Открытие двери через домофон. Есть защита от повторного открытия (по умолчанию 8 секунд)
+        Открытие двери через домофон. Есть защита от повторного открытия (UNLOCK_COOLDOWN секунд):
+        на это время замок открыт и недоступен, по окончании общий планировщик закрывает его.
     """
 
-    def __init__(self, doorphone: DoorPhoneDevice, api: UfanetIntercomAPI):
+    def __init__(self, doorphone: DoorPhoneDevice, api: UfanetIntercomAPI, warmer: UnlockWarmer,
+                 coordinator: DoorPhoneCoordinator, cooldowns: CooldownScheduler):
         # Сохраняем идентифкатор домофона        
         self._intercom_id = doorphone._intercom.id
         # Ссылка на апи уфанета для открытия
         self._ufanet_api = api
+        # Прогрев соединения, пока вероятны повторные открытия
+        self._warmer = warmer
+        # После открытия координатор временно опрашивает историю чаще
+        self._coordinator = coordinator
+        # Общий таймер охлаждения всех замков
+        self._cooldowns = cooldowns
         # Само устройство домофона
         self._device = doorphone
 
@@ -47,14 +61,10 @@ class DoorPhoneLock(LockEntity):
         self._attr_icon = "mdi:door-closed-lock"
 
         # Состояние замка (по умолчанию закрыт)
-        self._is_locked = True
-        # время последнего открытия
-        self._last_unlock_time: datetime | None = None
-        # время в течении которого нельзя повторно открывать дверь
-        self._cooldown_seconds = 8
-        # текщее состояние открытия
-        self._is_unlocking = False
-        
+        self._attr_is_locked = True
+        # Недоступен, пока идет открытие и охлаждение; меняется только вместе с записью состояния
+        self._attr_available = True
+
     @property
     def device_info(self) -> DeviceInfo:
         """Устройство домофона, к которому привязан замок"""
@@ -64,59 +74,60 @@ class DoorPhoneLock(LockEntity):
             manufacturer="Ufanet",
             model=f"Intercom (model {self._device._intercom.model})"
         )
-    
-    @property
-    def is_locked(self) -> bool:
-        """Возвращает состояние замка."""
-        return self._is_locked
-    
-    @property
-    def available(self) -> bool:
-        """Доступность замка для открытия."""
-        if self._is_unlocking or self._last_unlock_time is None:
-            return not self._is_unlocking
-        
-        time_since_last_unlock = datetime.now() - self._last_unlock_time
-        return time_since_last_unlock.total_seconds() >= self._cooldown_seconds
-    
+
     async def async_unlock(self, **kwargs) -> None:
         """Открыть дверь через домофон."""
-        if not self.available or self._is_unlocking:
+        if not self._attr_available:
             return
 
-        self._is_unlocking = True
-        self._is_locked = False
-        self.async_write_ha_state()
-
+        self.async_begin_unlock()
         try:
-            # Открываем дверь через API
-            await self._ufanet_api.open_intercom(intercom_id=self._intercom_id)
-            # Засекаем время открытия
-            self._last_unlock_time = datetime.now()
-        except Exception:
-            # В случае ошибки возвращаем состояние "закрыто"
-            self._is_locked = True
+            # Открываем дверь через API: короткий таймаут и дублирующий запрос, если первый завис
+            opened = await self._ufanet_api.open_intercom(intercom_id=self._intercom_id, timeout=UNLOCK_TIMEOUT,
+                                                          hedge_after=UNLOCK_HEDGE_AFTER)
+        except BaseException:
+            self.async_end_unlock(False)
             raise
-        finally:
-            self._is_unlocking = False
-            self.async_write_ha_state()
-            
-            # Автоматически "закрываем" замок после задержки
-            self.hass.loop.call_later(
-                self._cooldown_seconds, 
-                lambda: self.hass.create_task(self._async_lock_after_cooldown())
-            )
-    
+        if not opened:
+            # Облако ответило, но дверь не открыло
+            self.async_end_unlock(False)
+            raise HomeAssistantError(f"Intercom {self._intercom_id} did not open")
+        self.async_end_unlock(True)
+        self._warmer.async_touch()
+        self._coordinator.async_note_activity()
+
+    @callback
+    def async_begin_unlock(self) -> None:
+        """Открытие началось: замок открыт и недоступен."""
+        self._attr_is_locked = False
+        self._attr_available = False
+        self.async_write_ha_state()
+
+    @callback
+    def async_end_unlock(self, success: bool, cooldown: float = UNLOCK_COOLDOWN) -> None:
+        """
+            Открытие закончилось. При успехе состояние не меняется до конца охлаждения,
+            при ошибке замок сразу закрыт и доступен (без таймера).
+        """
+        if success:
+            self._cooldowns.schedule(self._attr_unique_id, cooldown, self._async_cooldown_finished)
+            return
+        self._attr_is_locked = True
+        self._attr_available = True
+        self.async_write_ha_state()
+
     async def async_lock(self, **kwargs) -> None:
         """Замок домофона всегда можно "закрыть" программно."""
-        self._is_locked = True
+        self._attr_is_locked = True
         self.async_write_ha_state()
-        
-    async def _async_lock_after_cooldown(self) -> None:
-        """Автоматически закрыть замок после периода охлаждения."""
-        self._is_locked = True
+
+    @callback
+    def _async_cooldown_finished(self) -> None:
+        """Охлаждение закончилось: замок закрыт и снова доступен (одна запись состояния)."""
+        self._attr_is_locked = True
+        self._attr_available = True
         self.async_write_ha_state()
 
-    async def _async_update_availability(self) -> None:
-        """Обновить доступность замка."""
-        self.async_write_ha_state()
\ No newline at end of file
+    async def async_will_remove_from_hass(self) -> None:
+        """При выгрузке записи или удалении домофона таймер не должен пережить сущность."""
+        self._cooldowns.cancel(self._attr_unique_id)
@@ -0,0 +1,107 @@
+"""Общий менеджер интеграции: один пул соединений и общие лимиты на все договоры."""
+from __future__ import annotations
+
+import logging
+import zlib
+
+from aiohttp import ClientSession
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+
+from .const import (DOMAIN, CONF_LOGGER_NAME, DATA_MANAGER, GLOBAL_MAX_CONCURRENT_REQUESTS, GLOBAL_RATE_LIMIT,
+                    GLOBAL_RATE_BURST, POLL_STAGGER_WINDOW, ARCHIVE_DB, ARCHIVE_MAX_AGE_DAYS, ARCHIVE_MAX_CALLS,
+                    UNLOCK_RESERVED_CONNECTIONS, CLIP_DIR)
+from .api.session import CONNECTOR_LIMIT_PER_HOST, create_connector, create_session, create_ssl_context
+from .api.lanes import BACKGROUND, PriorityLanes
+from .api.resilience import TokenBucket
+from .api.ufanet_api import UfanetIntercomAPI
+from .archive import CallArchive
+from .clips import ClipDownloader
+from .cooldown import CooldownScheduler
+
+_LOGGER = logging.getLogger(CONF_LOGGER_NAME)
+
+
+class DoorPhoneManager:
+    """
+        Живет в hass.data[DOMAIN][DATA_MANAGER] и общий для всех записей:
+        одна сессия (пул соединений) с приоритетными полосами запросов (открытие двери,
+        токены, фон), общий rate limit фоновых запросов, разнесенный по времени старт
+        опроса договоров, архив звонков и загрузчик их видеозаписей.
+    """
+
+    def __init__(self, hass: HomeAssistant, session: ClientSession):
+        self._hass = hass
+        self.session = session
+        self.rate_limiter = TokenBucket(rate=GLOBAL_RATE_LIMIT, capacity=GLOBAL_RATE_BURST)
+        # Пропускаем запросы всех договоров в пул, только пока в нем есть свободное соединение
+        self.lanes = PriorityLanes(capacity=CONNECTOR_LIMIT_PER_HOST, reserved=UNLOCK_RESERVED_CONNECTIONS,
+                                   limits={BACKGROUND: GLOBAL_MAX_CONCURRENT_REQUESTS})
+        # Охлаждение замков всех договоров на одном таймере
+        self.cooldowns = CooldownScheduler(hass.loop)
+        # Звонки всех договоров; база открывается при первой записи или запросе
+        self.archive = CallArchive(hass.config.path(ARCHIVE_DB), ARCHIVE_MAX_AGE_DAYS, ARCHIVE_MAX_CALLS)
+        # Видеозаписи звонков всех договоров: общие квота, число загрузок и скорость
+        self.clips = ClipDownloader(hass, hass.config.path(CLIP_DIR))
+        # entry_id -> API клиент договора
+        self.clients: dict[str, UfanetIntercomAPI] = {}
+
+    @property
+    def accounts(self) -> int:
+        """Сколько договоров обслуживает интеграция."""
+        return len(self.clients)
+
+    def create_client(self, entry_id: str, **kwargs) -> UfanetIntercomAPI:
+        """API клиент договора на общей сессии и общих лимитах."""
+        client = UfanetIntercomAPI(session=self.session, rate_limiter=self.rate_limiter,
+                                   lanes=self.lanes, **kwargs)
+        self.clients[entry_id] = client
+        _LOGGER.debug("Serving %s Ufanet accounts", self.accounts)
+        return client
+
+    def release_client(self, entry_id: str) -> None:
+        self.clients.pop(entry_id, None)
+
+    @staticmethod
+    def poll_offset(entry_id: str) -> float:
+        """Стабильный сдвиг первого опроса договора, чтобы записи не опрашивали облако одновременно."""
+        return zlib.crc32(entry_id.encode()) % 1000 / 1000 * POLL_STAGGER_WINDOW
+
+    def as_dict(self) -> dict:
+        return {
+            "accounts": self.accounts,
+            "rate_limiter_throttled": self.rate_limiter.throttled,
+            "lanes": self.lanes.as_dict(),
+            "cooldowns_active": len(self.cooldowns),
+            "clips": self.clips.as_dict(),
+        }
+
+
+async def async_get_manager(hass: HomeAssistant) -> DoorPhoneManager:
+    """Вернуть (создав при первом обращении) менеджер интеграции."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    manager: DoorPhoneManager | None = domain_data.get(DATA_MANAGER)
+    if manager is not None and not manager.session.closed:
+        return manager
+
+    # Загрузка сертификатов блокирующая, поэтому делаем её в executor один раз
+    ssl_context = await hass.async_add_executor_job(create_ssl_context)
+    manager = domain_data.get(DATA_MANAGER)
+    if manager is not None and not manager.session.closed:
+        return manager
+    manager = DoorPhoneManager(hass, create_session(connector=create_connector(ssl_context)))
+    domain_data[DATA_MANAGER] = manager
+
+    @callback
+    def _async_close_session(event: Event) -> None:
+        hass.async_create_task(manager.session.close())
+        hass.async_create_task(manager.archive.async_close())
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close_session)
+    return manager
+
+
+async def async_get_session(hass: HomeAssistant) -> ClientSession:
+    """Вернуть общую сессию интеграции (один пул соединений на все договоры)."""
+    return (await async_get_manager(hass)).session
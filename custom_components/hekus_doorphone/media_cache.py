@@ -0,0 +1,249 @@
+"""Ограниченный по размеру дисковый LRU-кэш медиа звонков (ключ - uuid звонка)."""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Optional
+
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_LOGGER_NAME
+from .api.cache import InFlight
+
+_LOGGER = logging.getLogger(CONF_LOGGER_NAME)
+
+
+class DiskLRUCache:
+    """
+        Файлы лежат в одной папке, порядок LRU держим в памяти.
+        Все операции с диском выполняются в executor.
+        Недокачанные .part тоже занимают квоту. Если partial_max_age не задан, докачки нет
+        и .part, оставшиеся с прошлого запуска, удаляются при загрузке индекса; иначе
+        брошенные .part удаляются, когда старше partial_max_age секунд, и первыми при вытеснении.
+        Файл, который сейчас пишется, не удаляется никогда.
+    """
+
+    def __init__(self, hass: HomeAssistant, directory: str, max_bytes: int, suffix: str = "",
+                 partial_max_age: Optional[float] = None):
+        self._hass = hass
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._suffix = suffix
+        self._partial_max_age = partial_max_age
+        # ключ -> размер файла, от самых старых к самым свежим
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+        # ключ -> размер .part, от давно не писавшихся к свежим; время последней записи - отдельно
+        self._partials: OrderedDict[str, int] = OrderedDict()
+        self._partial_touched: dict[str, float] = {}
+        self._partial_size = 0
+        # ключи, .part которых сейчас пишется
+        self._writing: set[str] = set()
+        self._in_flight = InFlight()
+        self._loaded = False
+
+    @property
+    def size(self) -> int:
+        """Занято на диске, включая недокачанные файлы."""
+        return self._size + self._partial_size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, f"{key}{self._suffix}")
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def _scan(self) -> tuple[list[tuple[float, str, int]], list[tuple[float, str, int]]]:
+        """Готовые файлы и .part, которые можно докачать, от старых к новым; брошенные .part удаляются."""
+        os.makedirs(self._directory, exist_ok=True)
+        part_suffix = f"{self._suffix}.part"
+        expire_before = time.time() - self._partial_max_age if self._partial_max_age is not None else None
+        files, partials, orphans = [], [], []
+        for entry in os.scandir(self._directory):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(part_suffix):
+                stat = entry.stat()
+                if expire_before is None or stat.st_mtime < expire_before:
+                    orphans.append(entry.path)
+                else:
+                    partials.append((stat.st_mtime, entry.name[:len(entry.name) - len(part_suffix)], stat.st_size))
+            elif entry.name.endswith(self._suffix) and not entry.name.endswith(".part"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name[:len(entry.name) - len(self._suffix)], stat.st_size))
+        if orphans:
+            _LOGGER.debug("Removing %s abandoned partial media files", len(orphans))
+            self._remove_files(orphans)
+        return sorted(files), sorted(partials)
+
+    async def async_load(self) -> None:
+        """Восстановить индекс по содержимому папки (старые файлы - первыми на вытеснение)."""
+        if self._loaded:
+            return
+        files, partials = await self._hass.async_add_executor_job(self._scan)
+        for _, key, size in files:
+            self._entries[key] = size
+            self._size += size
+        for touched, key, size in partials:
+            self._set_partial(key, size, touched)
+        self._loaded = True
+        await self._async_evict()
+
+    async def async_get(self, key: str) -> Optional[bytes]:
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        try:
+            return await self._hass.async_add_executor_job(self._read, self._path(key))
+        except OSError:
+            self._forget(key)
+            return None
+
+    @staticmethod
+    def _read(path: str) -> bytes:
+        with open(path, "rb") as file:
+            return file.read()
+
+    async def async_get_or_fetch(self, key: str, fetch: AsyncIterator[bytes]) -> Optional[bytes]:
+        """Вернуть данные из кэша или скачать их потоком; параллельные запросы одного ключа объединяются."""
+        data = await self.async_get(key)
+        if data is not None:
+            return data
+
+        async def _fetch() -> Optional[bytes]:
+            await self.async_store(key, fetch)
+            return await self.async_get(key)
+
+        return await self._in_flight.run(key, _fetch)
+
+    async def async_store(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        """Записать поток на диск по частям, без буферизации всего файла в памяти."""
+        path = self._path(key)
+        part = f"{path}.part"
+        file = await self._hass.async_add_executor_job(self._open, part)
+        self._writing.add(key)
+        try:
+            size = await self._async_write(key, file, chunks, 0)
+        except BaseException:
+            await self._hass.async_add_executor_job(self._discard, file, part)
+            self._forget_partial(key)
+            raise
+        finally:
+            self._writing.discard(key)
+        await self._async_commit(key, file, part, path, size)
+        return size
+
+    async def async_store_resumable(self, key: str, fetch: Callable[[int], AsyncIterator[bytes]]) -> int:
+        """
+            Как async_store, но при ошибке недокачанный .part остается на диске:
+            следующий вызов продолжит с его конца (fetch получает смещение).
+        """
+        path = self._path(key)
+        part = f"{path}.part"
+        self._writing.add(key)
+        try:
+            file, size = await self._hass.async_add_executor_job(self._open_append, part)
+            try:
+                size = await self._async_write(key, file, fetch(size), size)
+            except BaseException:
+                await self._hass.async_add_executor_job(file.close)
+                raise
+        finally:
+            self._writing.discard(key)
+        await self._async_commit(key, file, part, path, size)
+        return size
+
+    async def _async_write(self, key: str, file, chunks: AsyncIterator[bytes], size: int) -> int:
+        """Дописать поток в открытый .part, учитывая его размер в квоте."""
+        self._set_partial(key, size)
+        async for chunk in chunks:
+            await self._hass.async_add_executor_job(file.write, chunk)
+            size += len(chunk)
+            self._set_partial(key, size)
+            if self.size > self._max_bytes:
+                await self._async_evict()
+        return size
+
+    async def _async_commit(self, key: str, file, part: str, path: str, size: int) -> None:
+        await self._hass.async_add_executor_job(self._commit, file, part, path)
+        self._forget_partial(key)
+        self._forget(key)
+        self._entries[key] = size
+        self._size += size
+        await self._async_evict()
+
+    async def async_discard_partial(self, key: str) -> None:
+        """Удалить недокачанный файл (докачка больше не нужна)."""
+        if key in self._writing:
+            return
+        self._forget_partial(key)
+        await self._hass.async_add_executor_job(self._remove_files, [f"{self._path(key)}.part"])
+
+    def _open(self, path: str):
+        os.makedirs(self._directory, exist_ok=True)
+        return open(path, "wb")
+
+    def _open_append(self, path: str):
+        os.makedirs(self._directory, exist_ok=True)
+        file = open(path, "ab")
+        return file, file.tell()
+
+    @staticmethod
+    def _commit(file, part: str, path: str) -> None:
+        file.close()
+        os.replace(part, path)
+
+    @staticmethod
+    def _discard(file, part: str) -> None:
+        file.close()
+        try:
+            os.remove(part)
+        except OSError:
+            pass
+
+    def _forget(self, key: str) -> None:
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._size -= size
+
+    def _set_partial(self, key: str, size: int, touched: Optional[float] = None) -> None:
+        self._forget_partial(key)
+        self._partials[key] = size
+        self._partial_touched[key] = time.time() if touched is None else touched
+        self._partial_size += size
+
+    def _forget_partial(self, key: str) -> None:
+        size = self._partials.pop(key, None)
+        if size is not None:
+            self._partial_size -= size
+            self._partial_touched.pop(key, None)
+
+    async def _async_evict(self) -> None:
+        # Брошенные .part: сначала просроченные, затем, если квота превышена, остальные от старых к новым
+        expire_before = time.time() - self._partial_max_age if self._partial_max_age is not None else None
+        victims = []
+        for key in list(self._partials):
+            if key in self._writing:
+                continue
+            if (expire_before is None or self._partial_touched[key] >= expire_before) \
+                    and self.size <= self._max_bytes:
+                continue
+            self._forget_partial(key)
+            victims.append(f"{self._path(key)}.part")
+        while self.size > self._max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            victims.append(self._path(key))
+        if victims:
+            _LOGGER.debug("Evicting %s cached media files", len(victims))
+            await self._hass.async_add_executor_job(self._remove_files, victims)
+
+    @staticmethod
+    def _remove_files(paths: list[str]) -> None:
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,37 @@
+"""Адаптивный интервал опроса облака."""
+from __future__ import annotations
+
+from .const import (POLL_INTERVAL_MIN, POLL_INTERVAL_MAX, POLL_INTERVAL_ERROR_MAX, POLL_BACKOFF_FACTOR)
+
+
+class AdaptivePollInterval:
+    """
+        Часто опрашиваем сразу после звонка или открытия двери,
+        в простое интервал растет в POLL_BACKOFF_FACTOR раз за опрос до POLL_INTERVAL_MAX,
+        при ошибках - до POLL_INTERVAL_ERROR_MAX. Подсказка сервера (Retry-After) имеет приоритет.
+    """
+
+    def __init__(self, min_interval: float = POLL_INTERVAL_MIN, max_interval: float = POLL_INTERVAL_MAX,
+                 error_max_interval: float = POLL_INTERVAL_ERROR_MAX, factor: float = POLL_BACKOFF_FACTOR):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.error_max_interval = error_max_interval
+        self.factor = factor
+        self.current = max_interval
+
+    def activity(self) -> float:
+        """Был звонок или открытие: следующий звонок/событие вероятны скоро."""
+        self.current = self.min_interval
+        return self.current
+
+    def idle(self) -> float:
+        """Опрос прошел, ничего нового."""
+        self.current = min(self.current * self.factor, self.max_interval)
+        return self.current
+
+    def error(self, retry_after: float | None = None) -> float:
+        """Опрос не удался: отступаем сильнее, но не реже, чем просит сервер."""
+        self.current = min(max(self.current, self.min_interval) * self.factor, self.error_max_interval)
+        if retry_after is not None:
+            self.current = max(self.current, retry_after)
+        return self.current
@@ -1,36 +1,152 @@
-"""Sensor platform for Test Integration."""
+"""Sensor platform for Hekus DoorPhone integration: диагностика API клиента и последний звонок в домофон."""
 
 from __future__ import annotations
 
-from homeassistant.components.sensor import SensorEntity
+from datetime import timedelta
+from typing import Any, Callable
+
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN
-from .device import DoorPhoneDevice
+from .const import DOMAIN, SIGNAL_CALL
+from .device import DoorPhoneDevice, account_device_info
+from .catalog import IntercomCatalog
+from .api.metrics import ApiMetrics
+from .api.models import HistoryResult
+from .api.ufanet_api import UfanetIntercomAPI
+from .coordinator import DoorPhoneCoordinator
+
+# Метрики копятся в памяти клиента, сенсоры просто читают их раз в минуту
+SCAN_INTERVAL = timedelta(seconds=60)
+
+
+def _percentile(endpoint: str, q: float) -> Callable[[ApiMetrics], Any]:
+    def _value(metrics: ApiMetrics) -> float | None:
+        stats = metrics.get(endpoint)
+        value = stats.latency.percentile(q) if stats is not None else None
+        return round(value * 1000, 1) if value is not None else None
+    return _value
+
+
+# key, название, единица, иконка, state_class, функция значения
+SENSORS: tuple[tuple[str, str, str | None, str | None, SensorStateClass, Callable[[ApiMetrics], Any]], ...] = (
+    ("unlock_latency_p50", "Unlock latency p50", UnitOfTime.MILLISECONDS, "mdi:timer-outline",
+     SensorStateClass.MEASUREMENT, _percentile("open_intercom", 50)),
+    ("unlock_latency_p95", "Unlock latency p95", UnitOfTime.MILLISECONDS, "mdi:timer-outline",
+     SensorStateClass.MEASUREMENT, _percentile("open_intercom", 95)),
+    ("unlock_latency_p99", "Unlock latency p99", UnitOfTime.MILLISECONDS, "mdi:timer-outline",
+     SensorStateClass.MEASUREMENT, _percentile("open_intercom", 99)),
+    ("api_requests", "API requests", None, "mdi:counter",
+     SensorStateClass.TOTAL_INCREASING, lambda metrics: metrics.total_count),
+    ("api_errors", "API errors", None, "mdi:alert-circle-outline",
+     SensorStateClass.TOTAL_INCREASING, lambda metrics: metrics.total_errors),
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
-    """Set up the sensor platform."""
-        
-    sensors = [TestSensor()]
-    async_add_entities(sensors, True)
+    """Добавляем диагностические сенсоры API клиента и последний звонок для каждого домофона."""
+    api: UfanetIntercomAPI = hass.data[DOMAIN][entry.entry_id]["api"]
+    coordinator: DoorPhoneCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    catalog: IntercomCatalog = hass.data[DOMAIN][entry.entry_id]["catalog"]
+    entities: list[SensorEntity] = [ApiMetricSensor(entry, api, *sensor) for sensor in SENSORS]
+    entities.append(PollIntervalSensor(entry, coordinator))
+    async_add_entities(entities)
+
+    catalog.async_track_entities(
+        entry, async_add_entities,
+        lambda device: LastCallSensor(entry, device, catalog.latest_call(device, coordinator.data or ())),
+    )
+
+
+class ApiMetricSensor(SensorEntity):
+    """
+        Метрика API клиента (задержка открытия, счетчики запросов и ошибок).
+        Полная таблица по эндпоинтам - только в диагностике, чтобы не писать ее в recorder каждую минуту.
+    """
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
 
+    def __init__(self, entry: ConfigEntry, api: UfanetIntercomAPI, key: str, name: str, unit: str | None,
+                 icon: str | None, state_class: SensorStateClass, value_fn: Callable[[ApiMetrics], Any]):
+        self._ufanet_api = api
+        self._value_fn = value_fn
+        self._attr_unique_id = f"{entry.entry_id}_{key}"
+        self._attr_name = name
+        self._attr_native_unit_of_measurement = unit
+        self._attr_icon = icon
+        self._attr_state_class = state_class
+        self._attr_device_info = account_device_info(entry)
+
+    @property
+    def native_value(self) -> Any:
+        return self._value_fn(self._ufanet_api.metrics)
+
+
+class PollIntervalSensor(SensorEntity):
+    """Текущий интервал опроса истории звонков (адаптивный)."""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_name = "Poll interval"
+    _attr_icon = "mdi:timer-sync-outline"
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, entry: ConfigEntry, coordinator: DoorPhoneCoordinator):
+        self._coordinator = coordinator
+        self._attr_unique_id = f"{entry.entry_id}_poll_interval"
+        self._attr_device_info = account_device_info(entry)
+
+    @property
+    def native_value(self) -> float:
+        return round(self._coordinator.poll_interval, 1)
+
+
+class LastCallSensor(SensorEntity):
+    """Время последнего звонка в домофон; обновляется только по звонку в этот домофон."""
 
-class TestSensor(SensorEntity):
-    """Representation of a Test Sensor."""
-    
     _attr_has_entity_name = True
-    
-    def __init__(self, device: TestDevice, index: int, entry_id: str):
-        """Initialize the sensor."""
+    _attr_should_poll = False
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+    _attr_name = "Last call"
+    _attr_icon = "mdi:phone-incoming"
+
+    def __init__(self, entry: ConfigEntry, doorphone: DoorPhoneDevice, call: HistoryResult | None):
+        self.intercom_id = doorphone._intercom.id
+        self._entry_id = entry.entry_id
+        self._device = doorphone
+        self._call = call
+        self._attr_unique_id = f"intercom_{self.intercom_id}_last_call"
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return DeviceInfo(identifiers={(DOMAIN, self._device.device_id)})
+
+    @property
+    def native_value(self):
+        return self._call.called_at if self._call is not None else None
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        if self._call is None:
+            return None
+        return {"call_uuid": self._call.uuid, "porch": self._call.porch, "flat": self._call.flat}
 
-        self._attr_unique_id = f"test_sensor_12345_sensor"
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(async_dispatcher_connect(
+            self.hass, SIGNAL_CALL.format(self._entry_id, self.intercom_id), self._async_handle_call))
 
-        self._attr_name = f"Sensor Name"
-        self._attr_native_value = 1
+    @callback
+    def _async_handle_call(self, call: HistoryResult, new: bool) -> None:
+        self._call = call
+        self.async_write_ha_state()
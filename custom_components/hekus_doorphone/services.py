@@ -0,0 +1,188 @@
+"""Сервисы интеграции: групповое открытие дверей и запросы к архиву звонков."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (DOMAIN, DATA_MANAGER, CONF_LOGGER_NAME, CONF_ROUTES, UNLOCK_COOLDOWN,
+                    ARCHIVE_QUERY_LIMIT, ARCHIVE_QUERY_MAX_LIMIT)
+
+_LOGGER = logging.getLogger(CONF_LOGGER_NAME)
+
+SERVICE_OPEN_DOORS = "open_doors"
+ATTR_INTERCOM_IDS = "intercom_ids"
+ATTR_ROUTE = "route"
+
+OPEN_DOORS_SCHEMA = vol.All(
+    vol.Schema({
+        vol.Optional(ATTR_INTERCOM_IDS): vol.All(cv.ensure_list, [vol.Coerce(int)]),
+        vol.Optional(ATTR_ROUTE): cv.string,
+    }),
+    cv.has_at_least_one_key(ATTR_INTERCOM_IDS, ATTR_ROUTE),
+)
+
+SERVICE_QUERY_CALLS = "query_calls"
+WS_QUERY_CALLS = f"{DOMAIN}/calls/query"
+
+# Фильтры архива звонков: общие для сервиса и команды websocket
+QUERY_CALLS_FIELDS = {
+    vol.Optional("entry_id"): cv.string,
+    vol.Optional("since"): cv.datetime,
+    vol.Optional("until"): cv.datetime,
+    vol.Optional("camera_number"): cv.string,
+    vol.Optional("skud_mac"): cv.string,
+    vol.Optional("house_id"): vol.Coerce(int),
+    vol.Optional("limit", default=ARCHIVE_QUERY_LIMIT): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=ARCHIVE_QUERY_MAX_LIMIT)),
+}
+QUERY_CALLS_SCHEMA = vol.Schema(QUERY_CALLS_FIELDS)
+
+
+def parse_routes(text: str) -> dict[str, list[int]]:
+    """Маршруты из настроек: по строке «имя: id, id, ...». ValueError при ошибке."""
+    routes: dict[str, list[int]] = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        name, separator, ids = line.partition(":")
+        if not separator or not name.strip():
+            raise ValueError(line)
+        routes[name.strip()] = [int(intercom_id) for intercom_id in ids.replace(";", ",").split(",")
+                                if intercom_id.strip()]
+    return routes
+
+
+def format_routes(routes: dict[str, list[int]]) -> str:
+    return "\n".join(f"{name}: {', '.join(map(str, ids))}" for name, ids in routes.items())
+
+
+def _find_route(hass: HomeAssistant, name: str) -> list[int]:
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        ids = entry.options.get(CONF_ROUTES, {}).get(name)
+        if ids is not None:
+            return ids
+    raise HomeAssistantError(f"Unknown route: {name}")
+
+
+def _find_locks(hass: HomeAssistant) -> dict[int, Any]:
+    """Замки всех загруженных договоров по id домофона."""
+    locks: dict[int, Any] = {}
+    for key, data in hass.data.get(DOMAIN, {}).items():
+        if key != DATA_MANAGER:
+            locks.update(data.get("locks", {}))
+    return locks
+
+
+async def async_open_doors(hass: HomeAssistant, intercom_ids: list[int], group_key: Any) -> dict[str, Any]:
+    """
+        Открыть несколько дверей одновременно (запросы идут параллельно по общему пулу
+        соединений, путь из N дверей занимает время одного запроса, а не N).
+        Охлаждение учитывается для группы целиком: повтор той же группы в течение
+        UNLOCK_COOLDOWN секунд ничего не открывает, двери в охлаждении пропускаются.
+    """
+    manager = hass.data.get(DOMAIN, {}).get(DATA_MANAGER)
+    if manager is None:
+        raise HomeAssistantError("Ufanet Door Phone is not loaded")
+    cooldowns = manager.cooldowns
+    started = time.monotonic()
+    intercom_ids = list(dict.fromkeys(intercom_ids))
+
+    if cooldowns.active(group_key):
+        remaining = round(cooldowns.remaining(group_key), 1)
+        return {"doors": {str(intercom_id): {"result": "cooldown", "remaining": remaining}
+                          for intercom_id in intercom_ids},
+                "elapsed_ms": 0}
+
+    # Занимаем охлаждение группы до запросов, чтобы параллельный вызов той же группы их не повторил
+    cooldowns.schedule(group_key, UNLOCK_COOLDOWN, lambda: None)
+    locks = _find_locks(hass)
+
+    async def _async_open(intercom_id: int) -> dict[str, Any]:
+        lock = locks.get(intercom_id)
+        if lock is None or lock.hass is None:
+            return {"result": "unknown"}
+        if not lock.available:
+            return {"result": "cooldown"}
+        door_started = time.monotonic()
+        try:
+            await lock.async_unlock()
+        except Exception as err:
+            _LOGGER.warning("Failed to open intercom %s: %s", intercom_id, err)
+            return {"result": "error", "error": str(err)}
+        return {"result": "opened", "elapsed_ms": round((time.monotonic() - door_started) * 1000)}
+
+    try:
+        results = await asyncio.gather(*(_async_open(intercom_id) for intercom_id in intercom_ids))
+    except BaseException:
+        cooldowns.cancel(group_key)
+        raise
+    if any(result["result"] == "opened" for result in results):
+        # Охлаждение отсчитываем от момента открытия
+        cooldowns.schedule(group_key, UNLOCK_COOLDOWN, lambda: None)
+    else:
+        cooldowns.cancel(group_key)
+    return {"doors": {str(intercom_id): result for intercom_id, result in zip(intercom_ids, results)},
+            "elapsed_ms": round((time.monotonic() - started) * 1000)}
+
+
+async def async_query_calls(hass: HomeAssistant, filters: dict[str, Any]) -> dict[str, Any]:
+    """Звонки из локального архива (без запросов к облаку), от новых к старым."""
+    manager = hass.data.get(DOMAIN, {}).get(DATA_MANAGER)
+    if manager is None:
+        raise HomeAssistantError("Ufanet Door Phone is not loaded")
+    # Время без часового пояса (из селектора) считаем временем HA
+    filters = {key: dt_util.as_utc(value) if key in ("since", "until") else value
+               for key, value in filters.items()}
+    started = time.monotonic()
+    calls = await manager.archive.async_query(**filters)
+    return {"calls": calls, "elapsed_ms": round((time.monotonic() - started) * 1000, 1)}
+
+
+@websocket_api.websocket_command({vol.Required("type"): WS_QUERY_CALLS, **QUERY_CALLS_FIELDS})
+@websocket_api.async_response
+async def _ws_query_calls(hass: HomeAssistant, connection: websocket_api.ActiveConnection,
+                          msg: dict[str, Any]) -> None:
+    filters = {key: value for key, value in msg.items() if key not in ("id", "type")}
+    try:
+        result = await async_query_calls(hass, filters)
+    except HomeAssistantError as err:
+        connection.send_error(msg["id"], websocket_api.const.ERR_NOT_FOUND, str(err))
+        return
+    connection.send_result(msg["id"], result)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Зарегистрировать сервисы интеграции (один раз, в async_setup)."""
+
+    async def _async_handle_open_doors(call: ServiceCall) -> ServiceResponse:
+        route = call.data.get(ATTR_ROUTE)
+        intercom_ids = list(call.data.get(ATTR_INTERCOM_IDS, []))
+        if route is not None:
+            intercom_ids += _find_route(hass, route)
+        group_key = ("route", route) if route is not None else ("doors", frozenset(intercom_ids))
+        return await async_open_doors(hass, intercom_ids, group_key)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_OPEN_DOORS, _async_handle_open_doors,
+        schema=OPEN_DOORS_SCHEMA, supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _async_handle_query_calls(call: ServiceCall) -> ServiceResponse:
+        return await async_query_calls(hass, dict(call.data))
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_QUERY_CALLS, _async_handle_query_calls,
+        schema=QUERY_CALLS_SCHEMA, supports_response=SupportsResponse.ONLY,
+    )
+    websocket_api.async_register_command(hass, _ws_query_calls)
@@ -0,0 +1,56 @@
+"""Поддержание «теплого» соединения с облаком, пока открытие двери вероятно."""
+from __future__ import annotations
+
+import logging
+import time
+from datetime import timedelta
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import CONF_LOGGER_NAME, WARM_KEEPALIVE_INTERVAL, WARM_WINDOW
+from .api.ufanet_api import UfanetIntercomAPI
+
+_LOGGER = logging.getLogger(CONF_LOGGER_NAME)
+
+
+class UnlockWarmer:
+    """
+        После открытия двери или звонка в домофон следующее открытие вероятно.
+        В течение WARM_WINDOW секунд периодически шлем легкий запрос, чтобы
+        соединение в пуле не закрылось по keep-alive, а токен был проверен заранее.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: UfanetIntercomAPI):
+        self._hass = hass
+        self._api = api
+        self._active_until = 0.0
+        self._unsub: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_touch(self) -> None:
+        """Отметить активность (открытие или звонок)."""
+        self._active_until = time.monotonic() + WARM_WINDOW
+        if self._unsub is None:
+            self._unsub = async_track_time_interval(
+                self._hass, self._async_keepalive, timedelta(seconds=WARM_KEEPALIVE_INTERVAL)
+            )
+
+    async def _async_keepalive(self, now=None) -> None:
+        if time.monotonic() > self._active_until:
+            self.async_stop()
+            return
+        await self._api.warm_up()
+
+    async def async_warm_up(self) -> None:
+        """Активность после простоя (звонок в домофон): соединение могло остыть, прогреваем сразу."""
+        idle = self._unsub is None
+        self.async_touch()
+        if idle:
+            await self._api.warm_up()
+
+    @callback
+    def async_stop(self) -> None:
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None